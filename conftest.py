@@ -0,0 +1,17 @@
+import shutil
+import tempfile
+
+import pytest
+from django.test import override_settings
+
+
+@pytest.fixture(scope='session', autouse=True)
+def temp_media_root():
+    """Картинки, которые создают тесты (mixer, миниатюры), пишутся во
+    временный каталог, а не в yatube/media.
+    """
+    media_root = tempfile.mkdtemp()
+    with override_settings(MEDIA_ROOT=media_root):
+        yield media_root
+    shutil.rmtree(media_root, ignore_errors=True)
+
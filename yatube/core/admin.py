@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from .models import RequestProfile, Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'status', 'priority', 'run_at', 'attempts', 'locked_by')
+    list_filter = ('status', 'name')
+    search_fields = ('name',)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'created', 'view_name', 'path', 'duration', 'user', 'stats_file',
+        'flamegraph_file')
+    list_filter = ('view_name',)
+    readonly_fields = (
+        'path', 'view_name', 'user', 'duration', 'stats_file',
+        'flamegraph_file')
+
+    def has_add_permission(self, request):
+        return False
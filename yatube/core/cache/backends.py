@@ -0,0 +1,266 @@
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+from core import metrics, timing
+
+MISSING = object()
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache, который сообщает о попаданиях и промахах в core.timing
+    и core.metrics.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version)
+        hit = value is not MISSING
+        timing.record_cache(hit)
+        metrics.cache_requests.inc('hit' if hit else 'miss')
+        return default if value is MISSING else value
+
+
+class TieredCache(BaseCache):
+    """Двухуровневый кэш: LRU в памяти процесса (L1) перед общим L2.
+
+    L1 хранит не больше L1_MAX_ENTRIES записей и не дольше L1_TIMEOUT
+    секунд. Запись и удаление идут в L2 и публикуются там же в журнал
+    инвалидаций: счётчик SEQ_KEY и записи ``LOG_KEY.<номер>`` с ключом.
+    Раз в SYNC_INTERVAL секунд процесс дочитывает журнал и выбрасывает
+    из своего L1 изменённые ключи; если журнал успел истечь или был
+    очищен, L1 сбрасывается целиком. Если L2 не умеет атомарный incr
+    (файловый кэш), два одновременных номера могут совпасть — тогда
+    устаревшее значение живёт не дольше L1_TIMEOUT.
+
+    OPTIONS: L2 — алиас общего кэша в CACHES, L1_MAX_ENTRIES, L1_TIMEOUT,
+    SYNC_INTERVAL, LOG_TIMEOUT.
+    """
+
+    SEQ_KEY = 'tiered:seq'
+    LOG_KEY = 'tiered:log:{}'
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options.get('L2', location)
+        self.l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.sync_interval = options.get('SYNC_INTERVAL', 0.5)
+        self.log_timeout = options.get('LOG_TIMEOUT', 300)
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._seen = None
+        self._synced = 0.0
+        self._own = set()
+        self._stats = Counter()
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    # L1
+
+    def _l1_get(self, made_key):
+        with self._lock:
+            entry = self._l1.get(made_key)
+            if entry is None:
+                return MISSING
+            expires, pickled = entry
+            if expires < time.monotonic():
+                del self._l1[made_key]
+                return MISSING
+            self._l1.move_to_end(made_key)
+        return pickle.loads(pickled)
+
+    def _l1_set(self, made_key, value, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            self._l1_drop(made_key)
+            return
+        ttl = self.l1_timeout
+        if timeout is not None:
+            ttl = min(ttl, timeout - time.time())
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._l1[made_key] = (time.monotonic() + ttl, pickled)
+            self._l1.move_to_end(made_key)
+            while len(self._l1) > self.l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_drop(self, *made_keys):
+        with self._lock:
+            for made_key in made_keys:
+                self._l1.pop(made_key, None)
+
+    def _l1_clear(self):
+        with self._lock:
+            self._l1.clear()
+
+    # Журнал инвалидаций
+
+    def _next_seq(self):
+        try:
+            return self.l2.incr(self.SEQ_KEY)
+        except ValueError:
+            self.l2.add(self.SEQ_KEY, 0, None)
+            return self.l2.incr(self.SEQ_KEY)
+
+    def _publish(self, *made_keys):
+        self._l1_drop(*made_keys)
+        for made_key in made_keys:
+            seq = self._next_seq()
+            with self._lock:
+                self._own.add(seq)
+            self.l2.set(
+                self.LOG_KEY.format(seq), made_key, self.log_timeout)
+
+    def sync(self, force=False):
+        """Применяет к L1 инвалидации других процессов."""
+        now = time.monotonic()
+        if not force and now - self._synced < self.sync_interval:
+            return
+        # Журнал дочитывает один поток, остальные не ждут.
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._synced = now
+            self._apply_log(self.l2.get(self.SEQ_KEY, 0))
+        finally:
+            self._sync_lock.release()
+
+    def _apply_log(self, current):
+        seen, self._seen = self._seen, current
+        # _publish пополняет _own из других потоков.
+        with self._lock:
+            own, self._own = self._own, {
+                seq for seq in self._own if seq > current}
+        if seen is None or current == seen:
+            return
+        if current < seen:
+            # L2 очищен — номера начались заново.
+            self._l1_clear()
+            return
+        seqs = [seq for seq in range(seen + 1, current + 1)
+                if seq not in own]
+        if len(seqs) > self.l1_max_entries:
+            self._l1_clear()
+            return
+        log = self.l2.get_many([self.LOG_KEY.format(seq) for seq in seqs])
+        if len(log) < len(seqs):
+            self._l1_clear()
+            return
+        self._l1_drop(*log.values())
+
+    def _record(self, tier, hit):
+        self._stats[tier, hit] += 1
+        metrics.cache_tier_requests.inc(tier, 'hit' if hit else 'miss')
+
+    def stats(self):
+        """Доля попаданий по уровням: L2 считается только по промахам L1.
+        """
+        result = {}
+        for tier in ('l1', 'l2'):
+            hits = self._stats[tier, True]
+            total = hits + self._stats[tier, False]
+            result[tier] = {
+                'hits': hits,
+                'misses': total - hits,
+                'ratio': hits / total if total else 0.0,
+            }
+        return result
+
+    # API кэша Django
+
+    def get(self, key, default=None, version=None):
+        self.sync()
+        made_key = self.make_key(key, version)
+        self.validate_key(made_key)
+        value = self._l1_get(made_key)
+        self._record('l1', value is not MISSING)
+        if value is MISSING:
+            value = self.l2.get(key, MISSING, version)
+            self._record('l2', value is not MISSING)
+            if value is not MISSING:
+                self._l1_set(made_key, value, DEFAULT_TIMEOUT)
+        hit = value is not MISSING
+        timing.record_cache(hit)
+        metrics.cache_requests.inc('hit' if hit else 'miss')
+        return default if value is MISSING else value
+
+    def get_many(self, keys, version=None):
+        self.sync()
+        found = {}
+        missing = []
+        for key in keys:
+            made_key = self.make_key(key, version)
+            value = self._l1_get(made_key)
+            self._record('l1', value is not MISSING)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            loaded = self.l2.get_many(missing, version)
+            for key in missing:
+                self._record('l2', key in loaded)
+            for key, value in loaded.items():
+                self._l1_set(self.make_key(key, version), value,
+                             DEFAULT_TIMEOUT)
+            found.update(loaded)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        made_key = self.make_key(key, version)
+        self.l2.set(key, value, timeout, version)
+        self._publish(made_key)
+        self._l1_set(made_key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version)
+        if added:
+            self._publish(self.make_key(key, version))
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout, version)
+        self._publish(*(self.make_key(key, version) for key in data))
+        for key, value in data.items():
+            if key not in failed:
+                self._l1_set(self.make_key(key, version), value, timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.l2.delete(key, version)
+        self._publish(self.make_key(key, version))
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.l2.delete_many(keys, version)
+        self._publish(*(self.make_key(key, version) for key in keys))
+
+    def has_key(self, key, version=None):
+        self.sync()
+        if self._l1_get(self.make_key(key, version)) is not MISSING:
+            return True
+        return self.l2.has_key(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.l2.incr(key, delta, version)
+        self._publish(self.make_key(key, version))
+        return value
+
+    def clear(self):
+        self.l2.clear()
+        self._l1_clear()
+        self._seen = None
+        with self._lock:
+            self._own.clear()
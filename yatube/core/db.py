@@ -0,0 +1,78 @@
+import functools
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+BUSY_MESSAGES = ('database is locked', 'database table is locked')
+
+
+@receiver(connection_created)
+def set_sqlite_pragmas(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение с SQLite (WAL, кэш, таймауты)."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def is_busy_error(exc):
+    return any(message in str(exc) for message in BUSY_MESSAGES)
+
+
+def atomic_everywhere():
+    """Транзакция сразу в default и на всех шардах постов."""
+    stack = ExitStack()
+    for alias in dict.fromkeys([DEFAULT_DB_ALIAS, *settings.POST_SHARDS]):
+        stack.enter_context(transaction.atomic(using=alias))
+    return stack
+
+
+def invalidate_on_commit(func, *args, using=None):
+    """Сбрасывает кэш сразу и ещё раз после коммита транзакции ``using``.
+
+    До коммита параллельный читатель видит старую строку и может вернуть
+    её в кэш; повторный сброс после коммита её убирает.
+    """
+    func(*args)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(functools.partial(func, *args), using=using)
+
+
+def retry_on_busy(func):
+    """Повторяет вызов, если SQLite ответил `database is locked`.
+
+    Предназначен для пишущих view: между попытками выдерживается
+    экспоненциальная пауза со случайным разбросом. Каждая попытка идёт в
+    транзакции, поэтому ошибка в записи из сигнала откатывает и уже
+    созданный пост — повтор не создаёт дубль. Запросы с файлами не
+    повторяются: откат не удаляет сохранённую картинку, и повтор
+    оставил бы её копию без поста.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = settings.SQLITE_BUSY_RETRIES
+        if args and getattr(args[0], 'FILES', None):
+            attempts = 1
+        delay = settings.SQLITE_BUSY_RETRY_DELAY
+        for attempt in range(attempts):
+            try:
+                with atomic_everywhere():
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if not is_busy_error(exc) or attempt == attempts - 1:
+                    raise
+                logger.warning(
+                    'SQLite занята, повтор %s из %s: %s',
+                    attempt + 1, attempts - 1, func.__qualname__)
+                time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
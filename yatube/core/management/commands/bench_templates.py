@@ -0,0 +1,70 @@
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from posts.models import Post
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время загрузки и рендера шаблонов без кэширующего '
+        'загрузчика и с ним.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=300)
+        parser.add_argument(
+            '--template', action='append', dest='templates',
+            help='Шаблон для замера (можно несколько раз).')
+
+    def handle(self, *args, **options):
+        templates = options['templates'] or [
+            'posts/group_list.html', 'posts/profile.html',
+            'posts/follow.html',
+        ]
+        engines = {
+            'без кэша': self.engine(LOADERS),
+            'cached.Loader': self.engine(
+                [('django.template.loaders.cached.Loader', LOADERS)]),
+        }
+        context, request = self.sample_context()
+        for name, engine in engines.items():
+            for template in templates:
+                engine.get_template(template)
+            started = time.perf_counter()
+            for _ in range(options['iterations']):
+                for template in templates:
+                    engine.get_template(template).render(context, request)
+            elapsed = time.perf_counter() - started
+            self.stdout.write('{:14} {:8.3f} мс на рендер'.format(
+                name,
+                elapsed * 1000 / (options['iterations'] * len(templates))))
+
+    def engine(self, loaders):
+        params = copy.deepcopy(settings.TEMPLATES[0])
+        params.pop('BACKEND')
+        params.update(NAME='bench', APP_DIRS=False)
+        params['OPTIONS']['loaders'] = loaders
+        return DjangoTemplates(params)
+
+    def sample_context(self):
+        posts = list(Post.objects.select_related('author', 'group')[:10])
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = {
+            'page_obj': Paginator(posts, 10).get_page(1),
+            'author': posts[0].author if posts else None,
+            'group': posts[0].group if posts else None,
+        }
+        return context, request
@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import autodiscover_modules
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи фоновой очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, когда очередь опустеет.')
+        parser.add_argument(
+            '--max-tasks', type=int, default=0,
+            help='Выйти после указанного числа задач.')
+        parser.add_argument(
+            '--sleep', type=float, default=settings.TASK_POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, секунды.')
+        parser.add_argument('--worker-id', default=None)
+
+    def handle(self, *args, **options):
+        autodiscover_modules('tasks')
+        worker_id = options['worker_id'] or tasks.default_worker_id()
+        self.stdout.write(
+            'Воркер {} готов, задач: {}'.format(
+                worker_id, len(tasks.registry)))
+        processed = 0
+        purged_at = None
+        try:
+            while True:
+                tasks.release_stale()
+                if purged_at is None or (time.monotonic() - purged_at
+                                         >= settings.TASK_PURGE_INTERVAL):
+                    tasks.purge_done()
+                    purged_at = time.monotonic()
+                if tasks.run_next(worker_id):
+                    processed += 1
+                    if processed == options['max_tasks']:
+                        break
+                    continue
+                if options['burst']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Выполнено задач: {}'.format(processed))
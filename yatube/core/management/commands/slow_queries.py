@@ -0,0 +1,36 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.slow_queries import summarize
+
+
+class Command(BaseCommand):
+    help = 'Печатает самые дорогие запросы из журнала медленных запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--sort', choices=('total', 'count', 'max'), default='total',
+            help='Порядок: суммарное время, число или худший случай.')
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG)
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options['log']):
+            raise CommandError(
+                'Журнал {} не найден.'.format(options['log']))
+        key = {
+            'total': 'total_ms', 'count': 'count', 'max': 'max_ms',
+        }[options['sort']]
+        items = sorted(
+            summarize(options['log']), key=lambda item: -item[key])
+        for item in items[:options['limit']]:
+            self.stdout.write(
+                '{count:6}x  всего {total_ms:9.1f} мс  '
+                'макс. {max_ms:8.1f} мс  {view_names}'.format(
+                    view_names=', '.join(sorted(item['views'])) or '-',
+                    **item))
+            self.stdout.write('    ' + item['fingerprint'])
+            for row in item['plan']:
+                self.stdout.write('    plan: ' + row)
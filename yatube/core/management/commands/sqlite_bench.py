@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+DEFAULT_PROFILE = {}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает параллельную запись в SQLite с настройками по умолчанию '
+        'и с профилем SQLITE_PRAGMAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--operations', type=int, default=500)
+        parser.add_argument(
+            '--timeout', type=float,
+            default=settings.SQLITE_PRAGMAS.get('busy_timeout', 5000) / 1000,
+            help='Ожидание блокировки в секундах, одно для обоих профилей.')
+
+    def handle(self, *args, **options):
+        # busy_timeout из профиля заменил бы --timeout только у одного из
+        # них: сравниваем WAL и остальные настройки, а не длину ожидания.
+        tuned = {
+            name: value for name, value in settings.SQLITE_PRAGMAS.items()
+            if name != 'busy_timeout'}
+        profiles = {
+            'default': DEFAULT_PROFILE,
+            'tuned': tuned,
+        }
+        for name, pragmas in profiles.items():
+            result = self.run_profile(pragmas, options)
+            self.stdout.write(
+                '{name:8} {elapsed:8.2f}s  writes/s {wps:9.1f}  '
+                'reads/s {rps:9.1f}  locked {locked}'.format(
+                    name=name, **result))
+
+    def connect(self, path, pragmas, timeout):
+        conn = sqlite3.connect(path, timeout=timeout)
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def run_profile(self, pragmas, options):
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        try:
+            conn = self.connect(path, pragmas, options['timeout'])
+            conn.execute(
+                'CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT)')
+            conn.commit()
+            conn.close()
+            return self.run_threads(path, pragmas, options)
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    def run_threads(self, path, pragmas, options):
+        stats = {'writes': 0, 'reads': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def worker(write):
+            conn = self.connect(path, pragmas, options['timeout'])
+            done = locked = 0
+            for i in range(options['operations']):
+                try:
+                    if write:
+                        conn.execute(
+                            'INSERT INTO post (text) VALUES (?)', (str(i),))
+                        conn.commit()
+                    else:
+                        conn.execute(
+                            'SELECT id, text FROM post '
+                            'ORDER BY id DESC LIMIT 10').fetchall()
+                    done += 1
+                except sqlite3.OperationalError:
+                    conn.rollback()
+                    locked += 1
+            conn.close()
+            with lock:
+                stats['writes' if write else 'reads'] += done
+                stats['locked'] += locked
+
+        threads = [
+            threading.Thread(target=worker, args=(True,))
+            for _ in range(options['writers'])
+        ] + [
+            threading.Thread(target=worker, args=(False,))
+            for _ in range(options['readers'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            'elapsed': elapsed,
+            'wps': stats['writes'] / elapsed,
+            'rps': stats['reads'] / elapsed,
+            'locked': stats['locked'],
+        }
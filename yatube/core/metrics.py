@@ -0,0 +1,267 @@
+"""Метрики процесса в текстовом формате Prometheus.
+
+Каждый поток пишет в собственный «шард» — обычный словарь, поэтому
+увеличение счётчика не берёт блокировок. Блокировка нужна только при
+появлении нового потока, при его завершении (шард вливается в общий
+итог и удаляется, так что потоки на запрос не копят шарды) и при сборе,
+который суммирует шарды всех потоков. Значения живут до перезапуска
+процесса.
+"""
+import bisect
+import itertools
+import threading
+import weakref
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class ThreadOwner:
+    """Живёт в threading.local потока: удаляется, когда поток завершён."""
+
+    __slots__ = ('__weakref__',)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            owner = self._local.owner = ThreadOwner()
+            with self._lock:
+                token = next(self._tokens)
+                self._shards[token] = shard
+            weakref.finalize(owner, self._retire, token)
+        return shard
+
+    def _retire(self, token):
+        with self._lock:
+            shard = self._shards.pop(token, None)
+            if shard:
+                self.merge(self._retired, shard)
+
+    def _snapshots(self):
+        with self._lock:
+            shards = list(self._shards.values())
+            retired = {}
+            self.merge(retired, self._retired)
+        # dict() копирует словарь целиком под GIL.
+        return [dict(shard) for shard in shards] + [retired]
+
+    def merge(self, totals, shard):
+        """Добавляет значения ``shard`` к ``totals``."""
+        raise NotImplementedError
+
+    def totals(self):
+        totals = {}
+        for shard in self._snapshots():
+            self.merge(totals, shard)
+        return totals
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards.values():
+                shard.clear()
+            self._retired.clear()
+
+    def labels(self, labels):
+        if not labels:
+            return ''
+        return '{' + ','.join(
+            '{}="{}"'.format(name, escape(value))
+            for name, value in labels) + '}'
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [
+            '# HELP {} {}'.format(self.name, self.documentation),
+            '# TYPE {} {}'.format(self.name, self.kind),
+        ]
+        for name, labels, value in self.samples():
+            lines.append('{}{} {}'.format(
+                name, self.labels(labels), format_value(value)))
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return sum(
+            shard.get(labelvalues, 0) for shard in self._snapshots())
+
+    def merge(self, totals, shard):
+        for key, value in shard.items():
+            totals[key] = totals.get(key, 0) + value
+
+    def samples(self):
+        for key, value in sorted(self.totals().items()):
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labelvalues):
+        shard = self._shard()
+        state = shard.get(labelvalues)
+        if state is None:
+            # Последняя ячейка — +Inf, затем сумма наблюдений.
+            state = shard[labelvalues] = [0] * (len(self.buckets) + 2)
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def merge(self, totals, shard):
+        for key, state in shard.items():
+            merged = totals.setdefault(key, [0] * len(state))
+            for index, value in enumerate(state):
+                merged[index] += value
+
+    def count(self, *labelvalues):
+        state = self.totals().get(labelvalues)
+        return sum(state[:-1]) if state else 0
+
+    def samples(self):
+        for key, state in sorted(self.totals().items()):
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            bounds = self.buckets + ('+Inf',)
+            for bound, count in zip(bounds, state[:-1]):
+                cumulative += count
+                yield (self.name + '_bucket',
+                       labels + (('le', format_value(bound)),), cumulative)
+            yield self.name + '_sum', labels, state[-1]
+            yield self.name + '_count', labels, cumulative
+
+
+class Gauge(Metric):
+    """Значение, вычисляемое при сборе функцией ``func``."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, func):
+        super().__init__(name, documentation)
+        self.func = func
+
+    def samples(self):
+        yield self.name, (), self.func()
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n')
+
+
+def format_value(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+requests_total = registry.register(Counter(
+    'yatube_requests_total', 'Обработанные запросы.', ('view', 'status')))
+request_latency = registry.register(Histogram(
+    'yatube_request_duration_seconds', 'Время обработки запроса.',
+    ('view',)))
+request_queries = registry.register(Histogram(
+    'yatube_request_queries', 'SQL-запросов на один HTTP-запрос.',
+    ('view',), buckets=QUERY_BUCKETS))
+cache_requests = registry.register(Counter(
+    'yatube_cache_requests_total', 'Чтения из кэша.', ('result',)))
+cache_tier_requests = registry.register(Counter(
+    'yatube_cache_tier_requests_total',
+    'Чтения двухуровневого кэша по уровням (L2 — только после промаха L1).',
+    ('tier', 'result')))
+compressed_responses = registry.register(Counter(
+    'yatube_compressed_responses_total', 'Ответы, сжатые gzip.',
+    ('content_type',)))
+compression_bytes = registry.register(Counter(
+    'yatube_compression_bytes_total',
+    'Размер сжатых ответов до (in) и после (out) сжатия.',
+    ('content_type', 'direction')))
+compression_cpu = registry.register(Counter(
+    'yatube_compression_cpu_seconds_total',
+    'Процессорное время на сжатие ответов.', ('content_type',)))
+thumbnails_total = registry.register(Counter(
+    'yatube_thumbnails_total', 'Запрошенные и созданные миниатюры.',
+    ('result',)))
+
+
+def hit_ratio(counter, *labels):
+    """Функция для Gauge: доля ``hit`` среди ``hit`` и ``miss``."""
+    def ratio():
+        totals = counter.totals()
+        hits = totals.get(labels + ('hit',), 0)
+        requests = hits + totals.get(labels + ('miss',), 0)
+        return hits / requests if requests else 0.0
+    return ratio
+
+
+def compression_ratio():
+    totals = compression_bytes.totals()
+    size_in = sum(value for (_, direction), value in totals.items()
+                  if direction == 'in')
+    size_out = sum(value for (_, direction), value in totals.items()
+                   if direction == 'out')
+    return size_out / size_in if size_in else 0.0
+
+
+registry.register(Gauge(
+    'yatube_compression_ratio',
+    'Отношение размера сжатых ответов к исходному.', compression_ratio))
+registry.register(Gauge(
+    'yatube_cache_hit_ratio', 'Доля попаданий при чтении из кэша.',
+    hit_ratio(cache_requests)))
+for tier in ('l1', 'l2'):
+    registry.register(Gauge(
+        'yatube_cache_{}_hit_ratio'.format(tier),
+        'Доля попаданий уровня {} двухуровневого кэша.'.format(
+            tier.upper()),
+        hit_ratio(cache_tier_requests, tier)))
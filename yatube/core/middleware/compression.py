@@ -0,0 +1,112 @@
+"""Сжатие ответов gzip с порогом размера и уровнем по типу содержимого.
+
+В отличие от django.middleware.gzip.GZipMiddleware, потоковые ответы
+сжимаются по частям с Z_SYNC_FLUSH, а для каждого ответа учитываются
+размер до и после сжатия и затраченное процессорное время — метрики
+yatube_compression_* на /metrics (core.metrics).
+"""
+import logging
+import re
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def record(content_type, size_in, size_out, cpu_time):
+    metrics.compressed_responses.inc(content_type)
+    metrics.compression_bytes.inc(content_type, 'in', amount=size_in)
+    metrics.compression_bytes.inc(content_type, 'out', amount=size_out)
+    metrics.compression_cpu.inc(content_type, amount=cpu_time)
+
+
+def media_type(response):
+    return response.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def compression_level(content_type):
+    levels = settings.COMPRESSION_LEVELS
+    return levels.get(content_type, levels['default'])
+
+
+def should_compress(request, response, content_type):
+    if response.has_header('Content-Encoding'):
+        return False
+    if not ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        return False
+    return not content_type.startswith(settings.COMPRESSION_SKIP_TYPES)
+
+
+def compress_stream(chunks, level, content_type):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    size_in = size_out = 0
+    cpu_time = 0.0
+    for chunk in chunks:
+        started = time.thread_time()
+        data = compressor.compress(chunk) + compressor.flush(
+            zlib.Z_SYNC_FLUSH)
+        cpu_time += time.thread_time() - started
+        size_in += len(chunk)
+        size_out += len(data)
+        if data:
+            yield data
+    started = time.thread_time()
+    data = compressor.flush()
+    cpu_time += time.thread_time() - started
+    size_out += len(data)
+    record(content_type, size_in, size_out, cpu_time)
+    yield data
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = media_type(response)
+        if not should_compress(request, response, content_type):
+            return response
+        if response.streaming:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            response.streaming_content = compress_stream(
+                response.streaming_content,
+                compression_level(content_type), content_type)
+            del response['Content-Length']
+            self.mark_compressed(response)
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        started = time.thread_time()
+        compressor = zlib.compressobj(
+            compression_level(content_type), zlib.DEFLATED, GZIP_WBITS)
+        compressed = compressor.compress(response.content) + (
+            compressor.flush())
+        cpu_time = time.thread_time() - started
+        if len(compressed) >= len(response.content):
+            return response
+        record(
+            content_type, len(response.content), len(compressed), cpu_time)
+        logger.debug(
+            '%s %s: %s -> %s байт (%.1f%%), %.2f мс CPU',
+            request.path, content_type, len(response.content),
+            len(compressed), 100 * len(compressed) / len(response.content),
+            cpu_time * 1000)
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        self.mark_compressed(response)
+        return response
+
+    def mark_compressed(self, response):
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+        response['Content-Encoding'] = 'gzip'
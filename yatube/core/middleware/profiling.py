@@ -0,0 +1,36 @@
+import cProfile
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.profiling import save_profile
+
+
+class ProfilerMiddleware:
+    """Профилирует запрос сотрудника, если он передал параметр
+    PROFILER_QUERY_PARAM или заголовок X-Profile.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.wants_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        response = profiler.runcall(self.get_response, request)
+        duration = time.perf_counter() - started
+        profile = save_profile(request, profiler, duration)
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
+
+    def wants_profile(self, request):
+        requested = (
+            settings.PROFILER_QUERY_PARAM in request.GET
+            or 'HTTP_X_PROFILE' in request.META
+        )
+        return requested and request.user.is_staff
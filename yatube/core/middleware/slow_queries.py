@@ -0,0 +1,17 @@
+from core import slow_queries
+
+
+class SlowQueryMiddleware:
+    """Сообщает журналу медленных запросов имя текущего view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.set_view(None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slow_queries.set_view(request.resolver_match.view_name)
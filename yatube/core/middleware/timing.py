@@ -0,0 +1,66 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core import timing
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """Добавляет заголовок Server-Timing и пишет строку лога по фазам
+    запроса. При выключенном SERVER_TIMING_ENABLED не подключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        timing.instrument_templates()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = timing.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            timing.stop()
+        total = timings.total()
+        response['Server-Timing'] = self.header(timings, total)
+        logger.info(json.dumps(self.summary(request, timings, total)))
+        return response
+
+    def header(self, timings, total):
+        return ', '.join((
+            'db;dur={:.1f};desc="{} queries"'.format(
+                timings.duration('db') * 1000, timings.count('db')),
+            'tmpl;dur={:.1f}'.format(timings.duration('template') * 1000),
+            'thumb;dur={:.1f};desc="{} thumbnails"'.format(
+                timings.duration('thumbnail') * 1000,
+                timings.count('thumbnail')),
+            'cache;desc="hits={} misses={}"'.format(
+                timings.cache_hits, timings.cache_misses),
+            'total;dur={:.1f}'.format(total * 1000),
+        ))
+
+    def summary(self, request, timings, total):
+        match = request.resolver_match
+        return {
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'total_ms': round(total * 1000, 2),
+            'db_queries': timings.count('db'),
+            'db_ms': round(timings.duration('db') * 1000, 2),
+            'template_ms': round(timings.duration('template') * 1000, 2),
+            'thumbnails': timings.count('thumbnail'),
+            'thumbnail_ms': round(timings.duration('thumbnail') * 1000, 2),
+            'cache_hits': timings.cache_hits,
+            'cache_misses': timings.cache_misses,
+        }
@@ -0,0 +1,99 @@
+"""Кэш объектов моделей «по запросу» (cache-aside).
+
+Объект хранится под ключом с первичным ключом. Для поиска по
+естественному ключу (slug, username) кэшируется только соответствие
+значение → pk; прочитанный объект сверяется с запрошенным значением,
+поэтому переименование или удаление не требует знать старое значение —
+достаточно сбросить запись по pk.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+
+OBJECT_KEY = 'object:{}:{}'
+NATURAL_KEY = 'object:{}:{}:{}'
+
+
+class ObjectCache:
+    def __init__(self, model, natural_key=None, select_related=(),
+                 timeout_setting='OBJECT_CACHE_TIMEOUT'):
+        self.model = model
+        self.natural_key = natural_key
+        self.select_related = tuple(select_related)
+        self.timeout_setting = timeout_setting
+        self.label = model._meta.label_lower
+
+    def get_timeout(self):
+        return getattr(settings, self.timeout_setting)
+
+    def key(self, pk):
+        return OBJECT_KEY.format(self.label, pk)
+
+    def natural(self, value):
+        return NATURAL_KEY.format(self.label, self.natural_key, value)
+
+    def manager(self):
+        manager = self.model._default_manager
+        if self.select_related:
+            return manager.select_related(*self.select_related)
+        return manager
+
+    def load(self, pk):
+        return self.manager().get(pk=pk)
+
+    def load_many(self, pks):
+        return self.manager().in_bulk(pks)
+
+    def get(self, pk=None, **lookup):
+        """Объект по pk или по естественному ключу.
+
+        Как и QuerySet.get, при отсутствии бросает model.DoesNotExist.
+        """
+        if pk is None:
+            return self.get_by_natural_key(lookup[self.natural_key])
+        obj = cache.get(self.key(pk))
+        if obj is None:
+            obj = self.load(pk)
+            cache.set(self.key(pk), obj, self.get_timeout())
+        return obj
+
+    def get_by_natural_key(self, value):
+        pk = cache.get(self.natural(value))
+        if pk is not None:
+            try:
+                obj = self.get(pk=pk)
+            except self.model.DoesNotExist:
+                obj = None
+            if obj is not None and getattr(obj, self.natural_key) == value:
+                return obj
+        obj = self.manager().get(**{self.natural_key: value})
+        cache.set_many({
+            self.key(obj.pk): obj,
+            self.natural(value): obj.pk,
+        }, self.get_timeout())
+        return obj
+
+    def get_or_404(self, pk=None, **lookup):
+        try:
+            return self.get(pk, **lookup)
+        except (self.model.DoesNotExist, ValueError):
+            raise Http404('No {} matches the given query.'.format(
+                self.model._meta.object_name))
+
+    def get_many(self, pks):
+        """Словарь {pk: объект}; недостающие читаются одним запросом."""
+        pks = list(pks)
+        cached = cache.get_many([self.key(pk) for pk in pks])
+        found = {pk: cached[self.key(pk)] for pk in pks
+                 if self.key(pk) in cached}
+        missing = [pk for pk in pks if pk not in found]
+        if missing:
+            loaded = self.load_many(missing)
+            cache.set_many({
+                self.key(pk): obj for pk, obj in loaded.items()
+            }, self.get_timeout())
+            found.update(loaded)
+        return found
+
+    def invalidate(self, *pks):
+        cache.delete_many([self.key(pk) for pk in pks])
@@ -0,0 +1,92 @@
+"""Сохранение cProfile-профилей запросов: pstats и свёрнутые стеки.
+
+Свёрнутые стеки (формат flamegraph.pl / speedscope) восстанавливаются из
+графа вызовов pstats: время узла делится между путями пропорционально
+накопленному времени по каждому ребру вызова, поэтому это оценка, а не
+точная выборка стеков. Каждое ребро графа раскрывается один раз.
+"""
+import os
+import pstats
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import RequestProfile
+
+MAX_DEPTH = 64
+MIN_MICROSECONDS = 10
+
+
+def frame_name(func):
+    filename, line, name = func
+    return '{}:{}:{}'.format(
+        os.path.basename(filename), name, line).replace(';', ',')
+
+
+def collapsed_stacks(stats):
+    """Возвращает {стек через ';': микросекунды}."""
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+    # Вызов, переданный в runcall, может оказаться в цикле (например,
+    # цепочка middleware через convert_exception_to_response.inner),
+    # поэтому корнем считается и функция с наибольшим временем.
+    roots = {
+        func for func, (_, _, _, _, callers) in stats.stats.items()
+        if not callers
+    }
+    roots.add(max(stats.stats, key=lambda func: stats.stats[func][3]))
+    result = defaultdict(int)
+
+    expanded = set()
+
+    def walk(func, weight, stack):
+        _, _, self_time, total_time, _ = stats.stats[func]
+        stack = stack + [frame_name(func)]
+        if total_time <= 0:
+            return
+        own = int(weight * self_time / total_time * 1e6)
+        if own >= MIN_MICROSECONDS:
+            result[';'.join(stack)] += own
+        if len(stack) >= MAX_DEPTH:
+            return
+        for callee, edge_time in sorted(
+                callees[func], key=lambda item: -item[1]):
+            share = weight * min(edge_time / total_time, 1)
+            # Одна функция может встречаться на разных уровнях (цепочка
+            # middleware), но каждое ребро раскрывается один раз: иначе
+            # число путей в графе с циклами растёт экспоненциально.
+            if share * 1e6 < MIN_MICROSECONDS or (func, callee) in expanded:
+                continue
+            expanded.add((func, callee))
+            walk(callee, share, stack)
+
+    for root in sorted(roots):
+        walk(root, stats.stats[root][3], [])
+    return result
+
+
+def save_profile(request, profiler, duration):
+    directory = settings.PROFILER_DIR
+    os.makedirs(directory, exist_ok=True)
+    match = request.resolver_match
+    view_name = match.view_name if match else ''
+    base = os.path.join(directory, '{}-{}'.format(
+        timezone.now().strftime('%Y%m%d-%H%M%S-%f'),
+        slugify(view_name or request.path) or 'root'))
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(base + '.pstats')
+    with open(base + '.collapsed', 'w') as output:
+        for stack, value in sorted(collapsed_stacks(stats).items()):
+            output.write('{} {}\n'.format(stack, value))
+    return RequestProfile.objects.create(
+        path=request.get_full_path()[:2000],
+        view_name=view_name,
+        user=request.user if request.user.is_authenticated else None,
+        duration=duration * 1000,
+        stats_file=base + '.pstats',
+        flamegraph_file=base + '.collapsed',
+    )
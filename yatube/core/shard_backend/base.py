@@ -0,0 +1,20 @@
+"""SQLite для шардов постов (posts.sharding).
+
+На шарде лежат только посты и комментарии, а их авторы и группы — в
+default, поэтому внешние ключи на шарде не создаются: ссылка на таблицу,
+которой там нет, ломает вставку. В default ограничения остаются.
+"""
+from django.db.backends.sqlite3 import base, features, schema
+
+
+class DatabaseFeatures(features.DatabaseFeatures):
+    supports_foreign_keys = False
+
+
+class DatabaseSchemaEditor(schema.DatabaseSchemaEditor):
+    sql_create_inline_fk = None
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    features_class = DatabaseFeatures
+    SchemaEditorClass = DatabaseSchemaEditor
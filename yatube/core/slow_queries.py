@@ -0,0 +1,130 @@
+"""Журнал медленных SQL-запросов.
+
+Обёртка выполнения ставится на каждое новое соединение. Запрос дольше
+SLOW_QUERY_THRESHOLD секунд записывается строкой JSON в SLOW_QUERY_LOG
+вместе с именем view, «отпечатком» SQL (литералы и списки IN заменены
+на ``?``), параметрами и планом из EXPLAIN QUERY PLAN. Сводку по
+отпечаткам печатает команда ``slow_queries``.
+"""
+import json
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER = re.compile(r'%s|\?')
+IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Нормализует SQL: одинаковые по форме запросы дают одну строку."""
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = PLACEHOLDER.sub('?', sql)
+    sql = IN_LIST.sub('IN (...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def set_view(view_name):
+    _local.view = view_name
+
+
+def explain(connection, sql, params):
+    """План запроса. Сам EXPLAIN проходит мимо журнала."""
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+    _local.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [' '.join(str(col) for col in row)
+                    for row in cursor.fetchall()]
+    except Exception as exc:
+        return ['EXPLAIN не удался: {}'.format(exc)]
+    finally:
+        _local.explaining = False
+
+
+def write_entry(entry):
+    path = settings.SLOW_QUERY_LOG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    line = json.dumps(entry, ensure_ascii=False, default=str)
+    with _write_lock, open(path, 'a', encoding='utf-8') as log:
+        log.write(line + '\n')
+
+
+class SlowQueryLogger:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, 'explaining', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= settings.SLOW_QUERY_THRESHOLD:
+                self.log(sql, params, many, duration)
+
+    def log(self, sql, params, many, duration):
+        plan = []
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            plan = explain(self.connection, sql, params)
+        write_entry({
+            'time': timezone.now().isoformat(),
+            'database': self.connection.alias,
+            'view': getattr(_local, 'view', None),
+            'duration_ms': round(duration * 1000, 2),
+            'fingerprint': fingerprint(sql),
+            'sql': sql,
+            'params': None if many else params,
+            'plan': plan,
+        })
+
+
+def summarize(path):
+    """Сводка журнала по отпечаткам: число, суммарное и худшее время."""
+    summary = {}
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            entry = json.loads(line)
+            item = summary.setdefault(entry['fingerprint'], {
+                'fingerprint': entry['fingerprint'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'views': set(),
+                'plan': entry['plan'],
+            })
+            item['count'] += 1
+            item['total_ms'] += entry['duration_ms']
+            if entry['duration_ms'] >= item['max_ms']:
+                item['max_ms'] = entry['duration_ms']
+                item['plan'] = entry['plan'] or item['plan']
+            if entry['view']:
+                item['views'].add(entry['view'])
+    return list(summary.values())
+
+
+@receiver(connection_created)
+def install_slow_query_logger(sender, connection, **kwargs):
+    if settings.SLOW_QUERY_THRESHOLD is None:
+        return
+    if not any(isinstance(wrapper, SlowQueryLogger)
+               for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(SlowQueryLogger(connection))
@@ -0,0 +1,113 @@
+"""Защита от «штормов» пересчёта при истечении ключей кэша.
+
+Значение хранится в конверте (значение, время расчёта, срок) и живёт в
+кэше на STAMPEDE_STALE_TTL дольше своего срока. ``get_or_compute``
+сочетает три приёма:
+
+* вероятностный досрочный пересчёт (XFetch): чем ближе срок и чем дольше
+  считалось значение, тем вероятнее, что запрос пересчитает его заранее;
+* короткую блокировку в кэше: пересчитывает один процесс, остальные
+  отдают устаревшее значение (stale-while-revalidate) или ждут;
+* объединение запросов внутри процесса: потоки с одним ключом ждут
+  результат первого потока, а не считают сами.
+
+Ждать чужой пересчёт можно не дольше STAMPEDE_WAIT_TIMEOUT: зависший
+расчёт не должен держать все запросы — после ожидания значение
+считается локально.
+"""
+import math
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+class InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def should_recompute(delta, expires, beta, now=None):
+    """Условие XFetch: now - delta * beta * ln(U) >= expires."""
+    now = time.time() if now is None else now
+    return now - delta * beta * math.log(1 - random.random()) >= expires
+
+
+def get_or_compute(key, compute, timeout, cache=None, beta=None):
+    """Значение по ключу; при промахе или досрочно считает ``compute()``.
+    """
+    cache = cache or default_cache
+    beta = settings.STAMPEDE_BETA if beta is None else beta
+    envelope = cache.get(key)
+    if envelope is not None:
+        value, delta, expires = envelope
+        if not should_recompute(delta, expires, beta):
+            return value
+    return coalesce(key, compute, timeout, cache, envelope)
+
+
+def coalesce(key, compute, timeout, cache, stale):
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = InFlight()
+    if not leader:
+        if stale is not None:
+            return stale[0]
+        if not call.done.wait(settings.STAMPEDE_WAIT_TIMEOUT):
+            return compute_and_store(key, compute, timeout, cache)
+        if call.error is not None:
+            raise call.error
+        return call.value
+    try:
+        call.value = recompute(key, compute, timeout, cache, stale)
+        return call.value
+    except Exception as exc:
+        call.error = exc
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        call.done.set()
+
+
+def recompute(key, compute, timeout, cache, stale):
+    lock_key = key + ':lock'
+    locked = cache.add(lock_key, 1, settings.STAMPEDE_LOCK_TIMEOUT)
+    if not locked:
+        if stale is not None:
+            return stale[0]
+        # Считает другой процесс: ждём его результат недолго, потом
+        # считаем сами.
+        deadline = time.monotonic() + settings.STAMPEDE_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            envelope = cache.get(key)
+            if envelope is not None:
+                return envelope[0]
+    try:
+        return compute_and_store(key, compute, timeout, cache)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def compute_and_store(key, compute, timeout, cache):
+    started = time.perf_counter()
+    value = compute()
+    delta = time.perf_counter() - started
+    if timeout is None:
+        cache.set(key, (value, delta, math.inf), None)
+    else:
+        cache.set(
+            key, (value, delta, time.time() + timeout),
+            timeout + settings.STAMPEDE_STALE_TTL)
+    return value
@@ -0,0 +1,35 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.html', '.txt', '.json', '.xml', '.ico',
+)
+
+
+class GzipManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, который рядом с каждым текстовым файлом
+    кладёт сжатую копию ``<имя>.gz`` для отдачи без сжатия на лету.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) >= len(content):
+            return
+        with open(path + '.gz', 'wb') as target:
+            target.write(compressed)
+        os.utime(path + '.gz', (os.path.getatime(path),
+                                os.path.getmtime(path)))
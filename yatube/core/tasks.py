@@ -0,0 +1,175 @@
+"""Фоновая очередь задач, хранящаяся в базе данных.
+
+Задача регистрируется декоратором ``@task`` и ставится в очередь через
+``func.delay(...)`` или ``func.apply_async(...)``. Выполняет задачи команда
+``run_worker``; воркеров может быть несколько, задача достаётся ровно одному
+из них благодаря условному UPDATE.
+"""
+import json
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func=None, *, name=None, priority=0, max_attempts=None):
+    """Регистрирует функцию как фоновую задачу."""
+    def decorator(func):
+        task_name = name or '{}.{}'.format(func.__module__, func.__qualname__)
+        registry[task_name] = func
+
+        def delay(*args, **kwargs):
+            return enqueue(
+                task_name, args, kwargs,
+                priority=priority, max_attempts=max_attempts)
+
+        def apply_async(args=(), kwargs=None, run_at=None, countdown=None,
+                        priority=priority):
+            if run_at is None and countdown is not None:
+                run_at = timezone.now() + timedelta(seconds=countdown)
+            return enqueue(
+                task_name, args, kwargs, priority=priority,
+                run_at=run_at, max_attempts=max_attempts)
+
+        func.task_name = task_name
+        func.delay = delay
+        func.apply_async = apply_async
+        return func
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, priority=0, run_at=None,
+            max_attempts=None):
+    return Task.objects.create(
+        name=name,
+        payload=json.dumps({'args': list(args), 'kwargs': kwargs or {}}),
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.TASK_MAX_ATTEMPTS,
+    )
+
+
+def default_worker_id():
+    return '{}:{}'.format(socket.gethostname(), os.getpid())
+
+
+def release_stale(now=None):
+    """Возвращает в очередь задачи, чей воркер пропал посреди работы.
+
+    Задача, исчерпавшая попытки, помечается упавшей: иначе задача,
+    которая роняет воркер, возвращалась бы в очередь бесконечно.
+    """
+    now = now or timezone.now()
+    expired = now - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=expired)
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, last_error='Воркер не завершил задачу',
+        locked_by='', locked_at=None)
+    return stale.update(status=Task.QUEUED, locked_by='', locked_at=None)
+
+
+def purge_done(now=None):
+    """Удаляет выполненные задачи старше TASK_DONE_TTL секунд.
+
+    Возвращает число удалённых. Удаляет пакетами по TASK_PURGE_BATCH,
+    чтобы не держать базу заблокированной. Упавшие задачи остаются для
+    разбора.
+    """
+    now = now or timezone.now()
+    expired = now - timedelta(seconds=settings.TASK_DONE_TTL)
+    done = Task.objects.filter(status=Task.DONE, run_at__lt=expired)
+    purged = 0
+    while True:
+        ids = list(done.values_list('pk', flat=True)[
+            :settings.TASK_PURGE_BATCH])
+        if not ids:
+            return purged
+        purged += Task.objects.filter(pk__in=ids).delete()[0]
+
+
+def claim(worker_id, now=None):
+    """Забирает самую приоритетную готовую задачу или возвращает None.
+
+    Кандидат переводится в RUNNING условным UPDATE по статусу, поэтому при
+    гонке нескольких воркеров задачу получает только один.
+    """
+    now = now or timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.QUEUED, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'pk').values_list('pk', flat=True)
+    for pk in candidates[:settings.TASK_CLAIM_BATCH]:
+        claimed = Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def backoff(attempts):
+    delay = settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.TASK_RETRY_BACKOFF_MAX))
+
+
+def finish(job, **fields):
+    """Записывает итог задачи, если она всё ещё за этим воркером.
+
+    Задачу с истёкшей блокировкой release_stale мог отдать другому
+    воркеру — тогда итог пишет новый владелец.
+    """
+    updated = Task.objects.filter(
+        pk=job.pk, status=Task.RUNNING, locked_by=job.locked_by
+    ).update(locked_by='', locked_at=None, **fields)
+    if not updated:
+        logger.warning(
+            'Задача %s #%s уже не за воркером %s, итог не записан',
+            job.name, job.pk, job.locked_by)
+
+
+def execute(job):
+    """Выполняет взятую задачу и фиксирует результат в очереди."""
+    try:
+        func = registry[job.name]
+        payload = json.loads(job.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задача %s #%s упала', job.name, job.pk)
+        if job.attempts >= job.max_attempts:
+            finish(job, status=Task.FAILED, last_error=error)
+            return False
+        finish(
+            job,
+            status=Task.QUEUED,
+            run_at=timezone.now() + backoff(job.attempts),
+            last_error=error,
+        )
+        return False
+    finish(job, status=Task.DONE)
+    return True
+
+
+def run_next(worker_id=None):
+    """Выполняет одну готовую задачу. Возвращает False, если очередь пуста."""
+    job = claim(worker_id or default_worker_id())
+    if job is None:
+        return False
+    execute(job)
+    return True
@@ -0,0 +1,34 @@
+import os
+
+from django.template import (
+    TemplateDoesNotExist, TemplateSyntaxError, engines,
+)
+from django.template.utils import get_app_template_dirs
+
+
+def template_names(directories):
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    yield os.path.relpath(
+                        os.path.join(root, filename), directory)
+
+
+def warm_templates():
+    """Компилирует все шаблоны заранее, чтобы наполнить cached.Loader.
+
+    Вызывается при старте WSGI-процесса, если включён TEMPLATE_WARMUP.
+    Возвращает число загруженных шаблонов.
+    """
+    loaded = 0
+    for engine in engines.all():
+        directories = list(engine.dirs) + list(
+            get_app_template_dirs('templates'))
+        for name in set(template_names(directories)):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError):
+                continue
+            loaded += 1
+    return loaded
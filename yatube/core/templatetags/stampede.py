@@ -0,0 +1,45 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.stampede import get_or_compute
+
+register = template.Library()
+
+
+class StampedeCacheNode(template.Node):
+    def __init__(self, nodelist, expire_time, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.expire_time = expire_time
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        expire_time = int(self.expire_time.resolve(context))
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = 'stampede.' + make_template_fragment_key(
+            self.fragment_name, vary_on)
+        return get_or_compute(
+            key, lambda: self.nodelist.render(context), expire_time)
+
+
+@register.tag('stampede_cache')
+def do_stampede_cache(parser, token):
+    """Как ``{% cache %}``, но с защитой от одновременного пересчёта
+    (core.stampede)::
+
+        {% stampede_cache 500 index_page page_obj %}
+            ...
+        {% endstampede_cache %}
+    """
+    nodelist = parser.parse(('endstampede_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            '"{}" tag requires at least 2 arguments.'.format(tokens[0]))
+    return StampedeCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
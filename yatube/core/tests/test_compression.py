@@ -0,0 +1,66 @@
+import gzip
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+
+from core import metrics
+from core.middleware.compression import CompressionMiddleware
+
+HTML = '<p>Пост</p>' * 200
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+    def process(self, response, request=None):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(request or self.request)
+
+    def test_large_html_is_compressed(self):
+        """Крупная HTML-страница сжимается, статистика обновляется."""
+        response = self.process(HttpResponse(HTML))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(
+            gzip.decompress(response.content).decode(), HTML)
+        self.assertEqual(
+            metrics.compressed_responses.value('text/html'), 1)
+        self.assertLess(
+            metrics.compression_bytes.value('text/html', 'out'),
+            metrics.compression_bytes.value('text/html', 'in'))
+        self.assertIn('yatube_compression_ratio', metrics.registry.render())
+
+    def test_small_body_is_not_compressed(self):
+        """Маленький ответ отдаётся как есть."""
+        response = self.process(HttpResponse('<p>ok</p>'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_images_are_skipped(self):
+        """Картинки уже сжаты и не пережимаются."""
+        response = self.process(
+            HttpResponse(b'\x89PNG' * 500, content_type='image/png'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_client_without_gzip_gets_plain_response(self):
+        """Без Accept-Encoding: gzip ответ не сжимается."""
+        response = self.process(
+            HttpResponse(HTML), request=RequestFactory().get('/'))
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response_is_compressed_incrementally(self):
+        """Каждая часть потока сжимается и отдаётся сразу."""
+        chunks = [HTML.encode()[:1000], HTML.encode()[1000:]]
+        response = self.process(StreamingHttpResponse(iter(chunks)))
+
+        parts = list(response.streaming_content)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertGreaterEqual(len(parts), 2)
+        self.assertEqual(
+            gzip.decompress(b''.join(parts)), b''.join(chunks))
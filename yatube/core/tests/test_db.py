@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.test import (
+    RequestFactory, TestCase, TransactionTestCase, override_settings)
+
+from core.db import invalidate_on_commit, retry_on_busy
+from posts.cached import post_cache
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class SQLitePragmasTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_has_tuned_pragmas(self):
+        """Новое соединение получает настройки из SQLITE_PRAGMAS."""
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('temp_store'), 2)
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+
+
+@override_settings(SQLITE_BUSY_RETRIES=3, SQLITE_BUSY_RETRY_DELAY=0)
+class RetryOnBusyTests(TestCase):
+    def test_retries_locked_database(self):
+        """Вызов повторяется, пока база занята."""
+        func = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'ok'])
+        func.__qualname__ = 'view'
+
+        self.assertEqual(retry_on_busy(func)(), 'ok')
+        self.assertEqual(func.call_count, 2)
+
+    def test_failed_attempt_is_rolled_back(self):
+        """Запись упавшей попытки откатывается: повтор не создаёт дубль."""
+        calls = []
+
+        def view():
+            Group.objects.create(title='Группа', slug='group')
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(retry_on_busy(view)(), 'ok')
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_requests_with_files_are_not_retried(self):
+        """Откат не удаляет сохранённую картинку, повтор оставил бы копию.
+        """
+        request = RequestFactory().post(
+            '/', {'image': SimpleUploadedFile('small.gif', b'GIF89a')})
+        func = mock.Mock(side_effect=OperationalError('database is locked'))
+        func.__qualname__ = 'view'
+
+        with self.assertRaises(OperationalError):
+            retry_on_busy(func)(request)
+        self.assertEqual(func.call_count, 1)
+
+    def test_gives_up_after_last_attempt(self):
+        """После исчерпания попыток ошибка пробрасывается дальше."""
+        func = mock.Mock(side_effect=OperationalError('database is locked'))
+        func.__qualname__ = 'view'
+
+        with self.assertRaises(OperationalError):
+            retry_on_busy(func)()
+        self.assertEqual(func.call_count, 3)
+
+    def test_other_errors_are_not_retried(self):
+        """Ошибки, не связанные с блокировкой, не повторяются."""
+        func = mock.Mock(side_effect=OperationalError('no such table'))
+        func.__qualname__ = 'view'
+
+        with self.assertRaises(OperationalError):
+            retry_on_busy(func)()
+        self.assertEqual(func.call_count, 1)
+
+
+class InvalidateOnCommitTests(TransactionTestCase):
+    def test_outside_transaction_runs_once(self):
+        func = mock.Mock()
+
+        invalidate_on_commit(func, 1, 2)
+
+        func.assert_called_once_with(1, 2)
+
+    def test_runs_again_after_commit(self):
+        func = mock.Mock()
+
+        with transaction.atomic():
+            invalidate_on_commit(func, 1)
+            self.assertEqual(func.call_count, 1)
+
+        self.assertEqual(func.call_count, 2)
+
+    def test_stale_post_is_dropped_after_commit(self):
+        """Старая версия, попавшая в кэш до коммита, не переживает его."""
+        cache.clear()
+        post = Post.objects.create(
+            author=User.objects.create_user(username='author'), text='Было')
+        stale = post_cache.get(post.pk)
+
+        with transaction.atomic():
+            post.text = 'Стало'
+            post.save()
+            # Параллельный читатель ещё видит старую строку.
+            cache.set(post_cache.key(post.pk), stale)
+
+        self.assertEqual(post_cache.get(post.pk).text, 'Стало')
@@ -0,0 +1,97 @@
+import gc
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+
+    def test_requests_are_labelled_by_view_name(self):
+        """Запросы, время и число SQL учитываются по имени URL."""
+        Client().get(reverse('posts:index'))
+        Client().get(reverse('posts:index'))
+
+        self.assertEqual(
+            metrics.requests_total.value('posts:index', '200'), 2)
+        self.assertEqual(metrics.request_latency.count('posts:index'), 2)
+        self.assertEqual(metrics.request_queries.count('posts:index'), 2)
+        total_queries = metrics.request_queries.totals()[('posts:index',)][-1]
+        self.assertGreater(total_queries, 0)
+
+    def test_counters_are_summed_across_threads(self):
+        """Шарды разных потоков складываются при сборе."""
+        counter = metrics.Counter('test_total', 'Тест.', ('kind',))
+
+        def work():
+            for _ in range(1000):
+                counter.inc('a')
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.value('a'), 8000)
+
+    def test_finished_threads_leave_no_shards(self):
+        """Шард завершённого потока вливается в итог и удаляется."""
+        histogram = metrics.Histogram('test_seconds', 'Тест.')
+
+        for _ in range(50):
+            thread = threading.Thread(target=histogram.observe, args=(0.2,))
+            thread.start()
+            thread.join()
+        gc.collect()
+
+        self.assertFalse(histogram._shards)
+        self.assertEqual(histogram.count(), 50)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_renders_prometheus_text(self):
+        """/metrics отдаёт метрики в текстовом формате Prometheus."""
+        Client().get(reverse('posts:index'))
+
+        response = Client().get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        for line in (
+            '# TYPE yatube_request_duration_seconds histogram',
+            'yatube_requests_total{view="posts:index",status="200"} 1',
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 1',
+            'yatube_request_queries_count{view="posts:index"} 1',
+            'yatube_cache_requests_total{result="miss"}',
+            '# TYPE yatube_cache_hit_ratio gauge',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_requires_token(self):
+        """Без токена /metrics не виден, даже с адреса прокси."""
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            with self.subTest(headers=headers):
+                response = Client(REMOTE_ADDR='127.0.0.1').get(
+                    reverse('metrics'), **headers)
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.cached import group_cache, post_cache
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ObjectCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookups_are_served_from_cache(self):
+        """Повторный поиск по pk и по slug не обращается к базе."""
+        group_cache.get(slug='group')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                group_cache.get(slug='group'), ObjectCacheTests.group)
+            self.assertEqual(
+                group_cache.get(pk=ObjectCacheTests.group.pk),
+                ObjectCacheTests.group)
+
+    def test_renamed_natural_key_is_not_served(self):
+        """После смены slug старое значение больше не находит группу."""
+        group_cache.get(slug='group')
+        group = Group.objects.get(pk=ObjectCacheTests.group.pk)
+        group.slug = 'renamed'
+        group.save()
+
+        with self.assertRaises(Http404):
+            group_cache.get_or_404(slug='group')
+        self.assertEqual(group_cache.get(slug='renamed').slug, 'renamed')
+
+    def test_get_many_reads_missing_objects_in_one_query(self):
+        """get_many читает недостающие объекты одним запросом."""
+        posts = [
+            Post.objects.create(author=ObjectCacheTests.user, text=str(n))
+            for n in range(3)
+        ]
+        post_cache.get(pk=posts[0].pk)
+        pks = [post.pk for post in posts]
+
+        with self.assertNumQueries(1):
+            found = post_cache.get_many(pks)
+        with self.assertNumQueries(0):
+            post_cache.get_many(pks)
+
+        self.assertEqual(sorted(found), sorted(pks))
+
+    def test_edited_post_is_visible_immediately(self):
+        """Правка поста сбрасывает его из кэша объектов."""
+        post = Post.objects.create(author=ObjectCacheTests.user, text='До')
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        Client().get(url)
+        post.text = 'После'
+        post.save()
+
+        response = Client().get(url)
+
+        self.assertEqual(response.context['post_detail'].text, 'После')
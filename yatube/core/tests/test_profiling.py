@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import RequestProfile
+
+User = get_user_model()
+TEMP_PROFILER_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILER_DIR=TEMP_PROFILER_DIR)
+class ProfilerMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_superuser(
+            username='staff', email='staff@example.com', password='pass')
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_PROFILER_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.staff_client = Client()
+        self.staff_client.force_login(ProfilerMiddlewareTests.staff)
+
+    def test_staff_request_is_profiled(self):
+        """Запрос сотрудника с ?_profile сохраняет pstats и стеки."""
+        response = self.staff_client.get(
+            reverse('posts:index') + '?_profile=1')
+
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.view_name, 'posts:index')
+        self.assertTrue(os.path.isfile(profile.stats_file))
+        with open(profile.flamegraph_file) as collapsed:
+            lines = collapsed.read().splitlines()
+        self.assertTrue(any('views.py:index:' in line for line in lines))
+        for line in lines:
+            self.assertTrue(line.rsplit(' ', 1)[1].isdigit())
+
+    def test_header_also_enables_profiling(self):
+        """Профиль снимается и по заголовку X-Profile."""
+        self.staff_client.get(reverse('posts:index'), HTTP_X_PROFILE='1')
+
+        self.assertEqual(RequestProfile.objects.count(), 1)
+
+    def test_regular_user_is_not_profiled(self):
+        """Обычный пользователь не может включить профилирование."""
+        client = Client()
+        client.force_login(ProfilerMiddlewareTests.user)
+
+        response = client.get(reverse('posts:index') + '?_profile=1')
+
+        self.assertFalse(response.has_header('X-Profile-Id'))
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_admin_lists_recent_profiles(self):
+        """Профили видны в админке."""
+        self.staff_client.get(reverse('posts:index') + '?_profile=1')
+
+        response = self.staff_client.get(
+            reverse('admin:core_requestprofile_changelist'))
+
+        self.assertContains(response, 'posts:index')
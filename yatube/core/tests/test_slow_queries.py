@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.slow_queries import fingerprint
+from posts.models import Post
+
+User = get_user_model()
+TEMP_LOG_DIR = tempfile.mkdtemp()
+TEMP_LOG = os.path.join(TEMP_LOG_DIR, 'slow.jsonl')
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_LOG=TEMP_LOG)
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_LOG_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        if os.path.exists(TEMP_LOG):
+            os.remove(TEMP_LOG)
+
+    def read_log(self):
+        with open(TEMP_LOG, encoding='utf-8') as log:
+            return [json.loads(line) for line in log]
+
+    def test_fingerprint_normalizes_literals(self):
+        """Литералы, параметры и списки IN заменяются заглушками."""
+        self.assertEqual(
+            fingerprint(
+                "SELECT * FROM t WHERE a = 'x''y' AND b = 10\n"
+                "  AND c IN (%s, %s, %s) LIMIT %s"),
+            'SELECT * FROM t WHERE a = ? AND b = ? AND c IN (...) LIMIT ?')
+
+    def test_queries_are_logged_with_view_and_plan(self):
+        """Запись содержит view, отпечаток, параметры и план."""
+        Client().get(reverse('posts:profile', kwargs={'username': 'auth'}))
+
+        entries = self.read_log()
+        selects = [entry for entry in entries
+                   if entry['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        self.assertTrue(all(
+            entry['view'] == 'posts:profile' for entry in selects))
+        self.assertTrue(all(entry['plan'] for entry in selects))
+        self.assertIn(['auth'], [entry['params'] for entry in selects])
+        self.assertFalse(any(
+            entry['sql'].startswith('EXPLAIN') for entry in entries))
+
+    def test_command_prints_top_offenders(self):
+        """Команда slow_queries группирует запросы по отпечатку."""
+        Client().get(reverse('posts:index'))
+        cache.clear()
+        Client().get(reverse('posts:index'))
+        out = StringIO()
+
+        call_command('slow_queries', sort='count', limit=1, stdout=out)
+
+        self.assertIn('2x', out.getvalue().splitlines()[0])
+        self.assertIn('posts:index', out.getvalue())
+        self.assertIn('plan:', out.getvalue())
@@ -0,0 +1,140 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    RequestFactory, SimpleTestCase, TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+
+from core import stampede
+from posts import page_cache
+from posts.cached import post_cache
+from posts.feeds import INDEX_FEED, feed_scope, paginate_feed
+from posts.models import Post
+
+User = get_user_model()
+
+
+def run_threads(count, target):
+    barrier = threading.Barrier(count)
+
+    def worker():
+        barrier.wait()
+        target()
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+@override_settings(STAMPEDE_BETA=1.0, STAMPEDE_LOCK_TIMEOUT=5,
+                   STAMPEDE_STALE_TTL=60, STAMPEDE_WAIT_TIMEOUT=2)
+class StampedeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def compute(self, value='value', delay=0.2):
+        def compute():
+            with self.calls_lock:
+                self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_concurrent_misses_compute_once(self):
+        """100 потоков с одним холодным ключом: пересчёт один."""
+        results = []
+
+        run_threads(100, lambda: results.append(
+            stampede.get_or_compute('hot', self.compute(), 60)))
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['value'] * 100)
+
+    def test_stale_value_served_while_locked(self):
+        """Пока пересчитывает другой процесс, отдаётся старое значение."""
+        cache.set('key', ('old', 0.1, time.time() - 1), 60)
+        cache.add('key:lock', 1, 5)
+        value = stampede.get_or_compute('key', self.compute('new'), 60)
+        self.assertEqual(value, 'old')
+        self.assertEqual(self.calls, 0)
+
+    def test_early_recompute(self):
+        """Долгий расчёт близко к сроку пересчитывается заранее."""
+        cache.set('key', ('old', 1e6, time.time() + 1), 60)
+        value = stampede.get_or_compute('key', self.compute('new', 0), 60)
+        self.assertEqual(value, 'new')
+        self.assertEqual(cache.get('key')[0], 'new')
+
+    def test_fresh_value_not_recomputed(self):
+        stampede.get_or_compute('key', self.compute('first', 0), 60)
+        value = stampede.get_or_compute('key', self.compute('second', 0), 60)
+        self.assertEqual(value, 'first')
+        self.assertEqual(self.calls, 1)
+
+    @override_settings(STAMPEDE_WAIT_TIMEOUT=0.1)
+    def test_hung_computation_does_not_block_waiters(self):
+        """Зависший расчёт в потоке не держит остальные запросы."""
+        release = threading.Event()
+        leader = threading.Thread(target=stampede.get_or_compute, args=(
+            'key', lambda: release.wait(5) and 'late', 60))
+        leader.start()
+        time.sleep(0.05)
+
+        started = time.monotonic()
+        value = stampede.get_or_compute('key', self.compute('local', 0), 60)
+
+        self.assertEqual(value, 'local')
+        self.assertLess(time.monotonic() - started, 1)
+        release.set()
+        leader.join()
+
+    @override_settings(STAMPEDE_WAIT_TIMEOUT=0.1)
+    def test_wait_for_other_process_is_short(self):
+        """Блокировка чужого процесса без старого значения ждёт недолго."""
+        cache.add('key:lock', 1, 5)
+
+        started = time.monotonic()
+        value = stampede.get_or_compute('key', self.compute('new', 0), 60)
+
+        self.assertEqual(value, 'new')
+        self.assertLess(time.monotonic() - started, 1)
+
+
+@override_settings(STAMPEDE_BETA=1.0, STAMPEDE_WAIT_TIMEOUT=5)
+class IndexStampedeTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username='author')
+        for index in range(15):
+            Post.objects.create(author=author, text='Пост {}'.format(index))
+        post_cache.get_many(Post.objects.values_list('pk', flat=True))
+        self.request = RequestFactory().get('/')
+
+    def index_page(self):
+        return paginate_feed(self.request, INDEX_FEED, Post.objects.all(), 10)
+
+    def test_concurrent_index_misses_query_once(self):
+        """100 потоков на холодной ленте: COUNT и id страницы — по
+        одному запросу на все потоки.
+        """
+        page_cache.bump(feed_scope(INDEX_FEED))
+        counts = []
+
+        def request():
+            with CaptureQueriesContext(connection) as queries:
+                self.index_page()
+            counts.append(len(queries))
+            connection.close()
+
+        run_threads(100, request)
+
+        self.assertEqual(sum(counts), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.index_page()), 10)
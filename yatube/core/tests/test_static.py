@@ -0,0 +1,85 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.templates import warm_templates
+from core.views import serve_static
+
+CSS = b'body { color: red; }\n' * 50
+
+
+class ProductionStaticTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.target = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.target, ignore_errors=True)
+        super().tearDownClass()
+
+    def collect(self):
+        with override_settings(
+                STATICFILES_DIRS=[ProductionStaticTests.source],
+                STATIC_ROOT=ProductionStaticTests.target,
+                STATICFILES_STORAGE=(
+                    'core.storage.GzipManifestStaticFilesStorage')):
+            call_command(
+                'collectstatic', interactive=False, verbosity=0,
+                stdout=StringIO())
+        css_dir = os.path.join(ProductionStaticTests.target, 'css')
+        return sorted(os.listdir(css_dir))
+
+    def test_collectstatic_builds_gzip_copies(self):
+        """collectstatic кладёт .gz рядом с исходным и хэшированным файлом."""
+        files = self.collect()
+
+        hashed = [
+            name for name in files
+            if name.startswith('site.') and name.endswith('.css')
+            and name != 'site.css'
+        ]
+        self.assertEqual(len(hashed), 1)
+        self.assertIn(hashed[0] + '.gz', files)
+        self.assertIn('site.css.gz', files)
+        path = os.path.join(ProductionStaticTests.target, 'css', 'site.css.gz')
+        with gzip.open(path) as f:
+            self.assertEqual(f.read(), CSS)
+
+    def test_hashed_file_is_served_gzipped_with_far_future_headers(self):
+        """Хэшированный файл отдаётся сжатым и с долгим кэшированием."""
+        hashed = [
+            name for name in self.collect()
+            if name.endswith('.css') and name != 'site.css'
+        ]
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        with override_settings(
+                STATIC_ROOT=ProductionStaticTests.target,
+                STATIC_CACHE_MAX_AGE=31536000):
+            response = serve_static(request, 'css/' + hashed[0])
+            plain = serve_static(RequestFactory().get('/'), 'css/site.css')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertFalse(plain.has_header('Cache-Control'))
+
+
+class TemplateWarmupTests(TestCase):
+    def test_warm_templates_compiles_project_templates(self):
+        """Прогрев загружает все шаблоны проекта."""
+        self.assertGreater(warm_templates(), 20)
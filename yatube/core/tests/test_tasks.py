@@ -0,0 +1,152 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+calls = []
+
+
+@tasks.task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(name='tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('boom')
+
+
+@override_settings(TASK_RETRY_BACKOFF=30)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_runs_task_with_arguments(self):
+        """Задача из очереди выполняется с переданными аргументами."""
+        record.delay('first')
+
+        self.assertTrue(tasks.run_next('worker'))
+        self.assertEqual(calls, ['first'])
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        self.assertFalse(tasks.run_next('worker'))
+
+    def test_higher_priority_runs_first(self):
+        """Задача с большим приоритетом берётся раньше."""
+        record.delay('low')
+        record.apply_async(args=('high',), priority=10)
+
+        tasks.run_next('worker')
+        tasks.run_next('worker')
+
+        self.assertEqual(calls, ['high', 'low'])
+
+    def test_scheduled_task_waits_for_run_at(self):
+        """Отложенная задача не выполняется раньше срока."""
+        job = record.apply_async(args=('later',), countdown=60)
+
+        self.assertFalse(tasks.run_next('worker'))
+        self.assertIsNotNone(
+            tasks.claim('worker', now=job.run_at + timedelta(seconds=1)))
+
+    def test_task_is_claimed_once(self):
+        """Одну задачу не могут забрать два воркера."""
+        record.delay('once')
+
+        self.assertIsNotNone(tasks.claim('worker-1'))
+        self.assertIsNone(tasks.claim('worker-2'))
+
+    def test_failed_task_is_retried_with_backoff(self):
+        """Упавшая задача возвращается в очередь с задержкой,
+        а после последней попытки помечается как ошибочная.
+        """
+        fail.delay()
+
+        tasks.run_next('worker')
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.QUEUED)
+        self.assertGreater(
+            job.run_at, timezone.now() + timedelta(seconds=20))
+        self.assertIn('boom', job.last_error)
+
+        tasks.execute(tasks.claim('worker', now=job.run_at))
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    @override_settings(TASK_LOCK_TIMEOUT=60)
+    def test_stale_task_is_released(self):
+        """Задача зависшего воркера возвращается в очередь."""
+        record.delay('stale')
+        tasks.claim('dead-worker')
+        Task.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(tasks.release_stale(), 1)
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
+
+    @override_settings(TASK_LOCK_TIMEOUT=60)
+    def test_stale_task_without_attempts_fails(self):
+        """Задача, раз за разом роняющая воркер, не крутится вечно."""
+        fail.delay()
+        for _ in range(2):
+            tasks.claim('dead-worker')
+            Task.objects.update(
+                locked_at=timezone.now() - timedelta(minutes=5))
+            tasks.release_stale()
+
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    @override_settings(TASK_LOCK_TIMEOUT=60)
+    def test_late_worker_does_not_overwrite_new_owner(self):
+        """Воркер, чью задачу забрали, не пишет итог за нового владельца."""
+        record.delay('slow')
+        slow = tasks.claim('slow-worker')
+        Task.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+        tasks.release_stale()
+        tasks.claim('new-worker')
+
+        tasks.execute(slow)
+
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.RUNNING)
+        self.assertEqual(job.locked_by, 'new-worker')
+
+    @override_settings(TASK_DONE_TTL=60, TASK_PURGE_BATCH=2)
+    def test_old_done_tasks_are_purged(self):
+        """Старые выполненные задачи удаляются, остальные остаются."""
+        for value in range(3):
+            record.delay(value)
+        while tasks.run_next('worker'):
+            pass
+        Task.objects.update(run_at=timezone.now() - timedelta(minutes=5))
+        fresh = record.delay('fresh')
+        fresh.status = Task.DONE
+        fresh.save()
+        failed = fail.delay()
+        Task.objects.filter(pk=failed.pk).update(
+            status=Task.FAILED, run_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(tasks.purge_done(), 3)
+        self.assertQuerysetEqual(
+            Task.objects.order_by('pk'), [fresh.pk, failed.pk],
+            transform=lambda job: job.pk)
+
+    @override_settings(TASK_DONE_TTL=0)
+    def test_run_worker_purges_done_tasks(self):
+        record.delay(1)
+        call_command('run_worker', burst=True, stdout=StringIO())
+
+        call_command('run_worker', burst=True, stdout=StringIO())
+
+        self.assertFalse(Task.objects.exists())
+
+    def test_run_worker_burst(self):
+        """Команда run_worker --burst разбирает очередь и завершается."""
+        record.delay(1)
+        record.delay(2)
+
+        call_command('run_worker', burst=True, stdout=StringIO())
+
+        self.assertEqual(sorted(calls), [1, 2])
@@ -0,0 +1,118 @@
+import shutil
+import tempfile
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from core import metrics
+from core.cache.backends import TieredCache
+
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'core.cache.backends.InstrumentedLocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': TEMP_CACHE_DIR,
+    },
+})
+class TieredCacheTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def worker(self, **options):
+        """Отдельный экземпляр — как кэш другого процесса."""
+        options = {'L2': 'shared', 'SYNC_INTERVAL': 0, **options}
+        return TieredCache('', {'OPTIONS': options})
+
+    def setUp(self):
+        self.first = self.worker()
+        self.second = self.worker()
+        self.first.clear()
+        metrics.registry.reset()
+
+    def test_second_read_is_served_from_l1(self):
+        """Значение из L2 оседает в L1 процесса."""
+        self.first.set('key', 'value')
+
+        self.assertEqual(self.second.get('key'), 'value')
+        self.assertEqual(self.second.get('key'), 'value')
+
+        stats = self.second.stats()
+        self.assertEqual(stats['l1']['hits'], 1)
+        self.assertEqual(stats['l2']['hits'], 1)
+        self.assertEqual(stats['l1']['ratio'], 0.5)
+
+    def test_write_in_one_process_invalidates_another(self):
+        """Запись и удаление в одном процессе видны в L1 другого."""
+        self.first.set('key', 'old')
+        self.second.get('key')
+
+        self.first.set('key', 'new')
+        self.assertEqual(self.second.get('key'), 'new')
+
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+
+        self.second.set('counter', 1)
+        self.first.get('counter')
+        self.second.incr('counter')
+        self.assertEqual(self.first.get('counter'), 2)
+
+    def test_publish_during_sync(self):
+        """Запись из другого потока, пока sync перебирает свои номера."""
+        cache = self.first
+        cache.sync(force=True)
+        writer = threading.Thread(target=cache.set, args=('other', 1))
+
+        class Own(set):
+            def __iter__(self):
+                for seq in super().__iter__():
+                    yield seq
+                    if writer.ident is None:
+                        writer.start()
+                        writer.join(0.2)
+
+        cache.set('key', 1)
+        cache._own = Own(cache._own)
+        cache.sync(force=True)
+        writer.join()
+
+        self.assertEqual(cache.get('other'), 1)
+
+    def test_l1_is_bounded_lru(self):
+        """L1 вытесняет давно не читанные ключи."""
+        worker = self.worker(L1_MAX_ENTRIES=2)
+        worker.set_many({'a': 1, 'b': 2})
+        worker.get('a')
+        worker.set('c', 3)
+
+        self.assertEqual(
+            list(worker._l1), [worker.make_key('a'), worker.make_key('c')])
+        self.assertEqual(worker.get_many(['a', 'b', 'c']),
+                         {'a': 1, 'b': 2, 'c': 3})
+
+    def test_clear_in_l2_drops_l1(self):
+        """Очистка L2 сбрасывает L1 остальных процессов."""
+        self.first.set('key', 'value')
+        self.second.get('key')
+
+        self.first.clear()
+
+        self.assertIsNone(self.second.get('key'))
+
+    def test_tier_ratios_are_exported(self):
+        """Доли попаданий по уровням видны в метриках."""
+        self.first.set('key', 'value')
+        self.second.get('key')
+        self.second.get('key')
+
+        body = metrics.registry.render()
+
+        self.assertIn('yatube_cache_l1_hit_ratio 0.5', body)
+        self.assertIn('yatube_cache_l2_hit_ratio 1', body)
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_header_reports_phases(self):
+        """Заголовок Server-Timing содержит все фазы запроса."""
+        with self.assertLogs('core.middleware.timing', 'INFO') as logs:
+            response = Client().get(reverse('posts:index'))
+
+        header = response['Server-Timing']
+        for phase in ('db;dur=', 'tmpl;dur=', 'thumb;dur=',
+                      'cache;desc="hits=', 'total;dur='):
+            with self.subTest(phase=phase):
+                self.assertIn(phase, header)
+        self.assertNotIn('desc="0 queries"', header)
+        self.assertIn('"view": "posts:index"', logs.output[0])
+
+    @override_settings(SERVER_TIMING_ENABLED=True)
+    def test_cache_hits_and_misses_are_counted(self):
+        """Повторный рендер закэшированного блока даёт попадание в кэш."""
+        Client().get(reverse('posts:index'))
+
+        response = Client().get(reverse('posts:index'))
+
+        self.assertNotIn('hits=0 ', response['Server-Timing'])
+
+    def test_disabled_by_default(self):
+        """По умолчанию заголовок не добавляется."""
+        response = Client().get(reverse('posts:index'))
+
+        self.assertFalse(response.has_header('Server-Timing'))
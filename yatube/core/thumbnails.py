@@ -0,0 +1,20 @@
+from sorl.thumbnail.base import ThumbnailBackend
+
+from core import metrics, timing
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, замеряющий получение миниатюр и считающий
+    созданные заново.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        metrics.thumbnails_total.inc('requested')
+        with timing.timed('thumbnail'):
+            return super().get_thumbnail(file_, geometry_string, **options)
+
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        metrics.thumbnails_total.inc('generated')
+        return super()._create_thumbnail(
+            source_image, geometry_string, options, thumbnail)
@@ -0,0 +1,112 @@
+"""Замер фаз запроса: SQL, рендер шаблонов, кэш, миниатюры.
+
+Замеры ведутся, только пока для текущего потока открыт сбор
+(``start()``/``stop()`` вызывает ServerTimingMiddleware). Вне запроса
+``record``/``record_cache`` сводятся к одному обращению к threading.local.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.render_depth = 0
+
+    def add(self, phase, duration):
+        count, total = self.phases.get(phase, (0, 0.0))
+        self.phases[phase] = (count + 1, total + duration)
+
+    def count(self, phase):
+        return self.phases.get(phase, (0, 0.0))[0]
+
+    def duration(self, phase):
+        return self.phases.get(phase, (0, 0.0))[1]
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+def start():
+    _local.timings = RequestTimings()
+    return _local.timings
+
+
+def current():
+    return getattr(_local, 'timings', None)
+
+
+def stop():
+    timings = current()
+    _local.timings = None
+    return timings
+
+
+def record(phase, duration):
+    timings = current()
+    if timings is not None:
+        timings.add(phase, duration)
+
+
+def record_cache(hit):
+    timings = current()
+    if timings is None:
+        return
+    if hit:
+        timings.cache_hits += 1
+    else:
+        timings.cache_misses += 1
+
+
+@contextmanager
+def timed(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """Обёртка для connection.execute_wrapper: время и число запросов."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record('db', time.perf_counter() - started)
+
+
+def instrument_templates():
+    """Оборачивает Template.render, чтобы учитывать внешний рендер.
+
+    Вложенные рендеры (include, extends) не суммируются повторно.
+    Вызывается ServerTimingMiddleware при включённом SERVER_TIMING_ENABLED.
+    """
+    from django.template.base import Template
+
+    if getattr(Template.render, 'instrumented', False):
+        return
+    render = Template.render
+
+    @functools.wraps(render)
+    def timed_render(self, context):
+        timings = current()
+        if timings is None or timings.render_depth:
+            return render(self, context)
+        timings.render_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            timings.render_depth -= 1
+            timings.add('template', time.perf_counter() - started)
+
+    timed_render.instrumented = True
+    Template.render = timed_render
@@ -1,4 +1,17 @@
+import hmac
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.static import serve
+
+from core.metrics import registry
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
 
 
 def page_not_found(request, exception):
@@ -6,8 +19,48 @@ def page_not_found(request, exception):
 
 
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html')
+    return render(request, 'core/403csrf.html', status=403)
 
 
 def server_error(request, reason=''):
     return render(request, 'core/500.html')
+
+
+def serve_static(request, path):
+    """Отдаёт собранную статику.
+
+    Файлы с хэшем в имени кэшируются клиентом «навсегда». Если клиент
+    принимает gzip и collectstatic подготовил ``.gz``-копию, отдаётся она.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    accepts_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if accepts_gzip and os.path.isfile(
+            os.path.join(settings.STATIC_ROOT, path + '.gz')):
+        response = serve(request, path + '.gz', settings.STATIC_ROOT)
+    else:
+        response = serve(request, path, settings.STATIC_ROOT)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME.search(path):
+        patch_cache_control(
+            response, public=True, max_age=settings.STATIC_CACHE_MAX_AGE,
+            immutable=True)
+    return response
+
+
+def has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(
+        header.encode(), 'Bearer {}'.format(token).encode())
+
+
+def metrics(request):
+    """Метрики в формате Prometheus для сборщика с токеном METRICS_TOKEN
+    (заголовок Authorization: Bearer) и сотрудников. Остальным адрес не
+    виден. Адрес клиента не проверяется: за обратным прокси он у всех
+    запросов 127.0.0.1.
+    """
+    if not (has_metrics_token(request) or request.user.is_staff):
+        raise Http404
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4')
@@ -1,10 +1,58 @@
 from django.contrib import admin
+from django.db import DEFAULT_DB_ALIAS
 
-from .models import Group, Post, Comment, Follow
+from . import sharding
+from .group_choices import use_cached_choices
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post)
+
+
+class ShardFilter(admin.SimpleListFilter):
+    title = 'шард'
+    parameter_name = 'shard'
+
+    def lookups(self, request, model_admin):
+        if not sharding.is_sharded():
+            return ()
+        return [(alias, alias) for alias in sharding.shards()]
+
+    def queryset(self, request, queryset):
+        if self.value() in sharding.shards():
+            return queryset.using(self.value())
+        return queryset
+
+
+class ShardedModelAdmin(admin.ModelAdmin):
+    """Админка постов и комментариев при нескольких шардах.
+
+    Список показывает один шард, выбранный в фильтре «шард» (по умолчанию
+    default): сортировать и листать записи нескольких баз админка не
+    умеет. Страница записи ищет её на шарде по id.
+    """
+
+    def get_list_filter(self, request):
+        return (ShardFilter,) + tuple(super().get_list_filter(request))
+
+    def get_list_select_related(self, request):
+        shard = request.GET.get(ShardFilter.parameter_name, DEFAULT_DB_ALIAS)
+        if shard != DEFAULT_DB_ALIAS:
+            # На шарде нет таблиц пользователей и групп.
+            return ()
+        return super().get_list_select_related(request)
+
+    def get_object(self, request, object_id, from_field=None):
+        if from_field is not None or not sharding.is_sharded():
+            return super().get_object(request, object_id, from_field)
+        try:
+            object_id = int(object_id)
+        except ValueError:
+            return None
+        return self.get_queryset(request).using(
+            sharding.shard_for_post(object_id)).filter(pk=object_id).first()
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(ShardedModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -13,10 +61,17 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group':
+            use_cached_choices(field)
+        return field
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -27,7 +82,7 @@ class GroupAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ShardedModelAdmin):
     list_display = ('pk', 'post', 'author', 'text', 'created')
     list_filter = ('created',)
 
@@ -35,3 +90,18 @@ class CommentAdmin(admin.ModelAdmin):
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('pk', 'user', 'author',)
+
+
+class ArchivedCommentInline(admin.TabularInline):
+    model = ArchivedComment
+    extra = 0
+
+
+@admin.register(ArchivedPost)
+class ArchivedPostAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group', 'archived')
+    list_select_related = ('author', 'group')
+    search_fields = ('text',)
+    list_filter = ('archived',)
+    inlines = (ArchivedCommentInline,)
+    empty_value_display = '-пусто-'
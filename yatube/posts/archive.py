@@ -0,0 +1,69 @@
+"""Перенос старых постов в архив.
+
+Посты старше порога вместе с комментариями копируются в ArchivedPost и
+ArchivedComment с теми же id и удаляются из основных таблиц пакетами по
+ARCHIVE_BATCH_SIZE, каждый пакет — в своей транзакции. Архив лежит в
+default, посты переносятся со всех шардов. Удаление идёт через ORM,
+поэтому сигналы сбрасывают ленты, кэши и счётчики групп так же, как при
+обычном удалении поста.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from . import sharding
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image', 'views',
+    'updated')
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def archive_threshold(days=None):
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable(before, using=DEFAULT_DB_ALIAS):
+    return Post.objects.using(using).filter(
+        pub_date__lt=before).order_by('pub_date')
+
+
+def archive_batch(before, batch_size, using=DEFAULT_DB_ALIAS):
+    """Переносит один пакет с шарда ``using``. Возвращает число
+    перенесённых постов.
+    """
+    with transaction.atomic(), transaction.atomic(using=using):
+        ids = list(archivable(before, using).values_list(
+            'pk', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        posts = Post.objects.using(using).filter(pk__in=ids)
+        comments = Comment.objects.using(using).filter(post_id__in=ids)
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**values) for values in posts.values(*POST_FIELDS))
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**values)
+            for values in comments.values(*COMMENT_FIELDS))
+        posts.delete()
+    return len(ids)
+
+
+def archive_posts(before, batch_size=None):
+    """Переносит в архив все посты, опубликованные раньше ``before``."""
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    total = 0
+    for alias in sharding.shards():
+        while True:
+            moved = archive_batch(before, batch_size, alias)
+            if not moved:
+                break
+            total += moved
+    return total
+
+
+def count_archivable(before):
+    return sharding.count(archivable(before))
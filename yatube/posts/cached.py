@@ -0,0 +1,58 @@
+"""Кэш постов и групп для поиска по pk и slug (см. core.object_cache).
+
+Посты хранятся вместе с автором и группой: переименование автора или
+группы сбрасывает их посты (posts.signals.touch_posts), в том числе
+архивные.
+"""
+from django.db import DEFAULT_DB_ALIAS
+
+from core.object_cache import ObjectCache
+from users.backends import user_cache
+
+from . import sharding
+from .models import ArchivedPost, Group, Post
+
+
+class PostCache(ObjectCache):
+    """Читает промахи с шарда поста (posts.sharding).
+
+    На шарде нет таблиц пользователей и групп, поэтому автор и группа
+    берутся там из своих кэшей объектов, а не через JOIN.
+    """
+
+    def queryset(self, alias):
+        if alias == DEFAULT_DB_ALIAS:
+            return self.manager().using(alias)
+        return self.model._default_manager.using(alias)
+
+    def load(self, pk):
+        post = self.queryset(sharding.shard_for_post(pk)).get(pk=pk)
+        attach_related([post])
+        return post
+
+    def load_many(self, pks):
+        found = {}
+        for posts in sharding.fan_out(
+                lambda alias: self.queryset(alias).in_bulk(pks)):
+            found.update(posts)
+        attach_related(found.values())
+        return found
+
+
+def attach_related(posts):
+    """Подставляет автора и группу постам, прочитанным без JOIN."""
+    posts = [post for post in posts if not Post.author.is_cached(post)]
+    if not posts:
+        return
+    authors = user_cache.get_many({post.author_id for post in posts})
+    groups = group_cache.get_many(
+        {post.group_id for post in posts if post.group_id})
+    for post in posts:
+        Post.author.field.set_cached_value(post, authors.get(post.author_id))
+        Post.group.field.set_cached_value(post, groups.get(post.group_id))
+
+
+group_cache = ObjectCache(Group, natural_key='slug')
+post_cache = PostCache(Post, select_related=('author', 'group'))
+archived_post_cache = ObjectCache(
+    ArchivedPost, select_related=('author', 'group'))
@@ -0,0 +1,73 @@
+"""Ленты постов в кэше как списки id.
+
+Для каждой ленты и страницы кэшируется только кортеж id постов (и общее
+число постов ленты), а сами посты берутся из кэша объектов
+(posts.cached.post_cache) одним get_many. Правка текста поста не меняет
+списки id, поэтому страницы лент остаются в кэше; новый, удалённый или
+перенесённый в другую группу пост увеличивает версию затронутых лент.
+Пересчёт защищён от одновременных промахов (core.stampede). При
+нескольких шардах списки собираются со всех шардов (posts.sharding).
+"""
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+
+from core.stampede import get_or_compute
+from . import page_cache, sharding
+from .cached import post_cache
+
+FEED_PAGE_KEY = 'feed:{}:{}:{}'
+FEED_COUNT_KEY = 'feed:{}:{}:count'
+INDEX_FEED = 'index'
+
+
+def feed_scope(name):
+    return 'feed:{}'.format(name)
+
+
+def group_feed(group_id):
+    return 'group:{}'.format(group_id)
+
+
+def author_feed(author_id):
+    return 'author:{}'.format(author_id)
+
+
+def follow_feed(user_id):
+    return 'follow:{}'.format(user_id)
+
+
+def bump_feeds(*names):
+    page_cache.bump(*(feed_scope(name) for name in names))
+
+
+def paginate_feed(request, name, queryset, per_page, depends_on=(),
+                  shards=None):
+    """Возвращает Page с постами ленты ``name``.
+
+    ``depends_on`` — другие ленты, изменение которых меняет и эту
+    (лента подписок зависит от общей ленты). ``shards`` — шарды, где
+    могут лежать посты ленты; по умолчанию опрашиваются все.
+    """
+    version = page_cache.versions(
+        *(feed_scope(feed) for feed in (name,) + tuple(depends_on)))
+    timeout = settings.FEED_CACHE_TIMEOUT
+    paginator = Paginator(queryset, per_page)
+    count = get_or_compute(
+        FEED_COUNT_KEY.format(name, version),
+        lambda: sharding.count(queryset, shards), timeout)
+    # Paginator.count — cached_property: подставляем готовое значение.
+    paginator.__dict__['count'] = count
+    try:
+        number = paginator.validate_number(request.GET.get('page'))
+    except PageNotAnInteger:
+        number = 1
+    except EmptyPage:
+        number = paginator.num_pages
+
+    bottom = (number - 1) * per_page
+    ids = get_or_compute(
+        FEED_PAGE_KEY.format(name, version, number),
+        lambda: sharding.page_ids(queryset, bottom, per_page, shards),
+        timeout)
+    posts = post_cache.get_many(ids)
+    return Page([posts[pk] for pk in ids if pk in posts], number, paginator)
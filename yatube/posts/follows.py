@@ -0,0 +1,112 @@
+"""Кэш подписок: отсортированный массив id авторов для каждого читателя,
+пакетные подписки и выдача рекомендаций «Кого почитать».
+"""
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .feeds import bump_feeds, follow_feed
+from .models import Follow, FollowSuggestion, User
+from .trending import queue_followed
+
+FOLLOW_BATCH_SIZE = 500
+FOLLOWEES_KEY = 'followees:{}'
+SUGGESTIONS_KEY = 'follow_suggestions:{}:{}'
+SUGGESTIONS_VERSION_KEY = 'follow_suggestions:version'
+
+
+def get_followee_ids(user_id):
+    """Возвращает отсортированный array('q') с id авторов из подписок."""
+    key = FOLLOWEES_KEY.format(user_id)
+    packed = cache.get(key)
+    if packed is None:
+        ids = Follow.objects.filter(user_id=user_id).order_by(
+            'author_id').values_list('author_id', flat=True)
+        packed = array('q', ids).tobytes()
+        cache.set(key, packed, settings.FOLLOWEES_CACHE_TIMEOUT)
+    followees = array('q')
+    followees.frombytes(packed)
+    return followees
+
+
+def is_following(user_id, author_id):
+    followees = get_followee_ids(user_id)
+    index = bisect_left(followees, author_id)
+    return index < len(followees) and followees[index] == author_id
+
+
+def invalidate_followees(user_id):
+    cache.delete(FOLLOWEES_KEY.format(user_id))
+
+
+def followees_changed(user_id):
+    invalidate_followees(user_id)
+    bump_feeds(follow_feed(user_id))
+
+
+def follow_authors(user_id, author_ids):
+    """Подписывает читателя на авторов. Возвращает id новых подписок.
+
+    bulk_create не шлёт сигналы, поэтому кэш подписок, лента и
+    популярность авторов обновляются здесь.
+    """
+    followees = set(get_followee_ids(user_id))
+    new = [pk for pk in dict.fromkeys(author_ids)
+           if pk != user_id and pk not in followees]
+    if not new:
+        return []
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=pk) for pk in new],
+        batch_size=FOLLOW_BATCH_SIZE, ignore_conflicts=True)
+    followees_changed(user_id)
+    queue_followed(new)
+    return new
+
+
+def unfollow_authors(user_id, author_ids):
+    """Отписывает читателя от авторов. Возвращает id удалённых подписок.
+    """
+    author_ids = list(dict.fromkeys(author_ids))
+    deleted = []
+    for start in range(0, len(author_ids), FOLLOW_BATCH_SIZE):
+        follows = Follow.objects.filter(
+            user_id=user_id,
+            author_id__in=author_ids[start:start + FOLLOW_BATCH_SIZE])
+        batch = set(follows.values_list('author_id', flat=True))
+        follows.filter(author_id__in=batch).delete()
+        deleted.extend(pk for pk in author_ids if pk in batch)
+    return deleted
+
+
+def suggestions_version():
+    # Начальная версия из часов: после вытеснения ключа не вернуться к
+    # уже использованному числу (см. posts.page_cache).
+    return cache.get_or_set(SUGGESTIONS_VERSION_KEY, time.time_ns, None)
+
+
+def invalidate_suggestions():
+    """Сбрасывает все рекомендации после пересчёта."""
+    try:
+        cache.incr(SUGGESTIONS_VERSION_KEY)
+    except ValueError:
+        cache.set(SUGGESTIONS_VERSION_KEY, time.time_ns(), None)
+
+
+def get_suggested_authors(user_id):
+    """Авторы из последнего пересчёта, на которых читатель ещё не подписан."""
+    key = SUGGESTIONS_KEY.format(suggestions_version(), user_id)
+    author_ids = cache.get(key)
+    if author_ids is None:
+        suggestion = FollowSuggestion.objects.filter(user_id=user_id).first()
+        author_ids = suggestion.author_ids if suggestion else []
+        cache.set(key, author_ids, settings.FOLLOW_SUGGESTIONS_TIMEOUT)
+    author_ids = [
+        pk for pk in author_ids if not is_following(user_id, pk)
+    ][:settings.FOLLOW_SUGGESTIONS_SHOWN]
+    if not author_ids:
+        return []
+    authors = User.objects.in_bulk(author_ids)
+    return [authors[pk] for pk in author_ids if pk in authors]
@@ -1,6 +1,7 @@
 from django.forms import ModelForm
 from django.forms import Textarea
 
+from .group_choices import use_cached_choices
 from .models import Post, Comment
 
 
@@ -16,6 +17,10 @@ class PostForm(ModelForm):
             'text': Textarea(attrs={'style': 'height: 193px;'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        use_cached_choices(self.fields['group'])
+
 
 class CommentForm(ModelForm):
     class Meta:
@@ -0,0 +1,45 @@
+"""Кэш вариантов выбора группы для PostForm и админки.
+
+В кэше лежит кортеж пар (id, title) под ключом с версией; сохранение или
+удаление группы увеличивает версию. Начальная версия берётся из часов,
+как в posts.page_cache: после вытеснения ключа версии старые варианты
+не читаются снова. Поле остаётся обычным
+ModelChoiceField: подменяются только варианты для отрисовки, а проверка
+отправленного значения по-прежнему идёт через queryset.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Group
+
+GROUP_CHOICES_KEY = 'group_choices:{}'
+GROUP_CHOICES_VERSION_KEY = 'group_choices:version'
+
+
+def group_choices_version():
+    return cache.get_or_set(GROUP_CHOICES_VERSION_KEY, time.time_ns, None)
+
+
+def invalidate_group_choices():
+    try:
+        cache.incr(GROUP_CHOICES_VERSION_KEY)
+    except ValueError:
+        cache.set(GROUP_CHOICES_VERSION_KEY, time.time_ns(), None)
+
+
+def get_group_choices():
+    key = GROUP_CHOICES_KEY.format(group_choices_version())
+    choices = cache.get(key)
+    if choices is None:
+        choices = tuple(Group.objects.values_list('pk', 'title'))
+        cache.set(key, choices, settings.GROUP_CHOICES_CACHE_TIMEOUT)
+    return choices
+
+
+def use_cached_choices(field):
+    """Подставляет в ModelChoiceField варианты из кэша (лениво)."""
+    empty = [] if field.empty_label is None else [('', field.empty_label)]
+    field.choices = lambda: empty + list(get_group_choices())
+    return field
@@ -0,0 +1,58 @@
+"""Поддержка счётчиков GroupStats без COUNT/MAX по таблице постов.
+
+Посты могут лежать на других шардах (posts.sharding), поэтому к ним нет
+JOIN: дата последнего поста берётся из кэша объектов.
+"""
+from django.db.models import Count, F, Q
+
+from . import sharding
+from .cached import post_cache
+from .models import Group, GroupStats, Post
+
+
+def is_newer(post, latest_id):
+    if latest_id is None:
+        return True
+    try:
+        return post_cache.get(pk=latest_id).pub_date < post.pub_date
+    except Post.DoesNotExist:
+        return True
+
+
+def post_added(group_id, post):
+    stats, _ = GroupStats.objects.get_or_create(group_id=group_id)
+    GroupStats.objects.filter(group_id=group_id).update(
+        post_count=F('post_count') + 1)
+    if is_newer(post, stats.latest_post_id):
+        # Условие на прежнее значение защищает от гонки двух постов.
+        GroupStats.objects.filter(
+            group_id=group_id, latest_post_id=stats.latest_post_id
+        ).update(latest_post=post)
+
+
+def post_removed(group_id, post_id):
+    GroupStats.objects.filter(group_id=group_id, post_count__gt=0).update(
+        post_count=F('post_count') - 1)
+    stale = GroupStats.objects.filter(group_id=group_id).filter(
+        Q(latest_post__isnull=True) | Q(latest_post_id=post_id))
+    if stale.exists():
+        latest = sharding.newest_pk(
+            Post.objects.filter(group_id=group_id).exclude(pk=post_id))
+        stale.update(latest_post_id=latest)
+
+
+def rebuild_group_stats():
+    """Пересчитывает счётчики всех групп с нуля."""
+    counts = dict.fromkeys(Group.objects.values_list('pk', flat=True), 0)
+    totals = Post.objects.filter(group__isnull=False).order_by().values_list(
+        'group_id').annotate(total=Count('pk'))
+    for rows in sharding.fan_out(lambda alias: list(totals.using(alias))):
+        for group_id, total in rows:
+            if group_id in counts:
+                counts[group_id] += total
+    for group_id, total in counts.items():
+        latest = sharding.newest_pk(Post.objects.filter(group_id=group_id))
+        GroupStats.objects.update_or_create(
+            group_id=group_id,
+            defaults={'post_count': total, 'latest_post_id': latest})
+    return len(counts)
@@ -0,0 +1,175 @@
+"""Уведомления о новых постах для потока Server-Sent Events.
+
+Все открытые потоки процесса подписаны на один Hub. Опрашивает источник
+не каждое соединение, а первый поток, у которого истёк интервал
+LIVE_POLL_INTERVAL (как сброс счётчика просмотров). Опрос читает из кэша
+версию общей ленты (posts.feeds) и идёт в базу только если она
+изменилась — одним запросом за всеми новыми постами. Дальше Hub
+раскладывает события по очередям подписчиков: общая лента получает все
+посты, лента подписок — посты своих авторов. Последние посты хранятся в
+буфере, чтобы переподключившийся клиент получил пропущенное по
+Last-Event-ID без запроса к базе.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db.models import Max
+from django.template.loader import render_to_string
+
+from . import sharding
+from .cached import post_cache
+from .feeds import INDEX_FEED, feed_scope
+from .models import Post
+from .page_cache import versions
+
+
+class Subscriber:
+    def __init__(self, authors=None, cards=False):
+        self.authors = authors
+        self.cards = cards
+        self.events = queue.Queue()
+
+    def wants(self, author_id):
+        return self.authors is None or author_id in self.authors
+
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.subscribers = set()
+            self.cursor = None
+            self.version = None
+            self.recent = deque(maxlen=settings.LIVE_BUFFER_SIZE)
+            self._last_poll = time.monotonic()
+
+    def start(self):
+        """Запоминает версию ленты и последний пост на момент старта."""
+        version = versions(feed_scope(INDEX_FEED))
+        latest = sharding.fan_out(lambda alias: Post.objects.using(
+            alias).aggregate(latest=Max('pk'))['latest'])
+        self.version = version
+        self.cursor = max((pk for pk in latest if pk), default=0)
+
+    def subscribe(self, authors=None, cards=False, limit=None):
+        """Подписчик ленты; ``authors`` — множество id авторов или None
+        для общей ленты. None, если подписчиков уже ``limit``.
+        """
+        subscriber = Subscriber(authors, cards)
+        with self._lock:
+            if limit is not None and len(self.subscribers) >= limit:
+                return None
+            if self.cursor is None:
+                self.start()
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self.subscribers.discard(subscriber)
+
+    def poll_if_due(self):
+        due = (time.monotonic() - self._last_poll
+               >= settings.LIVE_POLL_INTERVAL)
+        if due and self._poll_lock.acquire(blocking=False):
+            try:
+                self.poll()
+            finally:
+                self._poll_lock.release()
+
+    def poll(self):
+        """Раздаёт подписчикам новые посты. Возвращает их число."""
+        self._last_poll = time.monotonic()
+        version = versions(feed_scope(INDEX_FEED))
+        if version == self.version:
+            return 0
+        self.version = version
+        cursor = self.cursor
+        # После долгого простоя курсор мог сильно отстать: больше буфера
+        # всё равно не хранится, берём только последние посты.
+        size = settings.LIVE_BUFFER_SIZE
+        rows = sorted(row for rows in sharding.fan_out(
+            lambda alias: list(Post.objects.using(alias).filter(
+                pk__gt=cursor).order_by('-pk').values_list(
+                    'pk', 'author_id')[:size]))
+            for row in rows)[-size:]
+        if not rows:
+            return 0
+        self.cursor = rows[-1][0]
+        self.recent.extend(rows)
+        with self._lock:
+            subscribers = list(self.subscribers)
+        cards = {}
+        if any(subscriber.cards for subscriber in subscribers):
+            cards = render_cards([pk for pk, _ in rows])
+        for subscriber in subscribers:
+            event = self.event(subscriber, rows, cards)
+            if event is not None:
+                subscriber.events.put(event)
+        return len(rows)
+
+    def since(self, cursor, subscriber):
+        """Событие с постами из буфера после ``cursor`` или None."""
+        rows = [row for row in list(self.recent) if row[0] > cursor]
+        cards = render_cards(
+            [pk for pk, _ in rows]) if subscriber.cards and rows else {}
+        return self.event(subscriber, rows, cards)
+
+    def event(self, subscriber, rows, cards):
+        ids = [pk for pk, author_id in rows if subscriber.wants(author_id)]
+        if not ids:
+            return None
+        event = {'count': len(ids), 'cursor': self.cursor}
+        if subscriber.cards:
+            event['cards'] = [cards[pk] for pk in reversed(ids) if pk in cards]
+        return event
+
+
+def render_cards(ids):
+    """Карточки постов, отрисованные один раз для всех подписчиков."""
+    posts = post_cache.get_many(ids)
+    return {
+        pk: render_to_string('includes/post_card.html', {'post': post})
+        for pk, post in posts.items()}
+
+
+def format_event(event):
+    return 'id: {}\nevent: posts\ndata: {}\n\n'.format(
+        event['cursor'], json.dumps(event, ensure_ascii=False))
+
+
+def stream(hub, subscriber, cursor=None):
+    """Тело ответа text/event-stream. Отписывается при закрытии."""
+    try:
+        yield 'retry: {}\n\n'.format(settings.LIVE_RETRY_MS)
+        if cursor is not None:
+            event = hub.since(cursor, subscriber)
+            if event is not None:
+                yield format_event(event)
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < settings.LIVE_STREAM_TIMEOUT:
+            hub.poll_if_due()
+            try:
+                event = subscriber.events.get(
+                    timeout=settings.LIVE_POLL_INTERVAL)
+            except queue.Empty:
+                if (time.monotonic() - last_sent
+                        >= settings.LIVE_HEARTBEAT_INTERVAL):
+                    last_sent = time.monotonic()
+                    yield ': keepalive\n\n'
+                continue
+            last_sent = time.monotonic()
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+hub = Hub()
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import (
+    archive_posts, archive_threshold, count_archivable)
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Возраст поста в днях (по умолчанию ARCHIVE_AFTER_DAYS).')
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Постов в одной транзакции (по умолчанию '
+                 'ARCHIVE_BATCH_SIZE).')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать посты, которые будут перенесены.')
+
+    def handle(self, *args, **options):
+        before = archive_threshold(options['days'])
+        if options['dry_run']:
+            self.stdout.write('Будет перенесено постов: {}'.format(
+                count_archivable(before)))
+            return
+        total = archive_posts(before, options['batch_size'])
+        self.stdout.write('Перенесено постов: {}'.format(total))
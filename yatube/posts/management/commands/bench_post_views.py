@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.db import atomic_everywhere
+from posts.models import Post
+from posts.sharding import shard_for_post
+from posts.view_counter import VIEWS_KEY, view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость post_detail с буферизованным счётчиком '
+        'просмотров и без него, а также стоимость записи просмотров. '
+        'Записанные замером просмотры откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--post-id', type=int, default=None)
+
+    def handle(self, *args, **options):
+        post = Post.objects.filter(pk=options['post_id']).first() if (
+            options['post_id']) else Post.objects.first()
+        if post is None:
+            raise CommandError('Нет постов для замера.')
+        with atomic_everywhere():
+            try:
+                self.bench(post, options['requests'])
+            finally:
+                view_counter.reset()
+                for alias in {DEFAULT_DB_ALIAS, *settings.POST_SHARDS}:
+                    transaction.set_rollback(True, using=alias)
+        cache.delete(VIEWS_KEY.format(post.pk))
+
+    def bench(self, post, total):
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        for enabled in (False, True):
+            with override_settings(
+                    VIEW_COUNTER_ENABLED=enabled, ALLOWED_HOSTS=['*']):
+                elapsed = self.measure(Client(), url, total)
+            self.stdout.write('post_detail, счётчик {}: {:.1f} req/s'.format(
+                'включён' if enabled else 'выключен', total / elapsed))
+        view_counter.reset()
+
+        posts = Post.objects.using(shard_for_post(post.pk)).filter(pk=post.pk)
+        started = time.perf_counter()
+        for _ in range(total):
+            posts.update(views=F('views') + 1)
+        direct = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(total):
+            view_counter.increment(post.pk)
+        view_counter.flush()
+        buffered = time.perf_counter() - started
+        self.stdout.write(
+            'Запись {} просмотров: UPDATE на просмотр {:.4f}s, '
+            'буфер {:.4f}s'.format(total, direct, buffered))
+
+    def measure(self, client, url, total):
+        client.get(url)
+        started = time.perf_counter()
+        for _ in range(total):
+            client.get(url)
+        return time.perf_counter() - started
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.rebalance import rebalance
+
+
+class Command(BaseCommand):
+    help = ('Переносит посты с комментариями на шарды авторов. '
+            'Запускать после изменения POST_SHARDS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Постов в одной транзакции (по умолчанию '
+                 'SHARD_MOVE_BATCH_SIZE).')
+        parser.add_argument(
+            '--source', action='append', default=[],
+            help='Алиас базы, убранной из POST_SHARDS: её посты тоже '
+                 'будут перенесены. Можно указать несколько раз.')
+
+    def handle(self, *args, **options):
+        total = rebalance(options['batch_size'], options['source'])
+        self.stdout.write('Перенесено постов: {}'.format(total))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.group_stats import rebuild_group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики каталога групп.'
+
+    def handle(self, *args, **options):
+        total = rebuild_group_stats()
+        self.stdout.write('Групп пересчитано: {}'.format(total))
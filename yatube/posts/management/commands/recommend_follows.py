@@ -0,0 +1,64 @@
+import resource
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.follows import invalidate_suggestions
+from posts.models import Follow, FollowSuggestion
+from posts.recommendations import compute_suggestions, synthetic_graph
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «Кого почитать» по графу подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=settings.FOLLOW_SUGGESTIONS_TOP_K)
+        parser.add_argument(
+            '--benchmark', type=int, default=0, metavar='EDGES',
+            help='Посчитать на случайном графе из EDGES подписок '
+                 'без записи в базу.')
+        parser.add_argument(
+            '--users', type=int, default=100000,
+            help='Число пользователей в случайном графе.')
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            self.benchmark(options)
+            return
+        edges = np.array(
+            Follow.objects.values_list('user_id', 'author_id'),
+            dtype=np.int64).reshape(-1, 2)
+        suggestions = compute_suggestions(
+            edges[:, 0], edges[:, 1], k=options['top_k'])
+        with transaction.atomic():
+            FollowSuggestion.objects.all().delete()
+            FollowSuggestion.objects.bulk_create(
+                (
+                    FollowSuggestion(
+                        user_id=user_id,
+                        authors=','.join(map(str, author_ids)))
+                    for user_id, author_ids in suggestions.items()
+                ),
+                batch_size=500,
+            )
+        invalidate_suggestions()
+        self.stdout.write(
+            'Подписок: {}, читателей с рекомендациями: {}'.format(
+                len(edges), len(suggestions)))
+
+    def benchmark(self, options):
+        followers, authors = synthetic_graph(
+            options['benchmark'], options['users'])
+        started = time.perf_counter()
+        suggestions = compute_suggestions(
+            followers, authors, k=options['top_k'])
+        elapsed = time.perf_counter() - started
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            'Подписок: {}, читателей: {}, время: {:.2f}s, '
+            'пик памяти: {:.0f} MiB'.format(
+                len(followers), len(suggestions), elapsed, peak))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import refresh_trending, schedule_refresh
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает список популярных постов и групп.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schedule', action='store_true',
+            help='Запланировать регулярный пересчёт в фоновой очереди.')
+
+    def handle(self, *args, **options):
+        top = refresh_trending()
+        self.stdout.write('Постов: {}, групп: {}'.format(
+            len(top['posts']), len(top['groups'])))
+        if options['schedule']:
+            schedule_refresh()
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0011_add_author_pub_date_index_post_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='follow_suggestion', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Читатель')),
+                ('authors', models.TextField(help_text='id авторов через запятую', verbose_name='Рекомендованные авторы')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Дата расчёта')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация',
+                'verbose_name_plural': 'Рекомендации',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_follow_suggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('group', 'Группа')], max_length=5, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('score', models.FloatField(default=0, verbose_name='Оценка на момент обновления')),
+                ('updated', models.DateTimeField(verbose_name='Дата обновления')),
+            ],
+            options={
+                'verbose_name': 'Оценка популярности',
+                'verbose_name_plural': 'Оценки популярности',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingscore',
+            index=models.Index(fields=['kind', '-updated'], name='trending_kind_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendingscore',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_trending_object'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    for group in Group.objects.annotate(total=Count('posts')):
+        latest = Post.objects.filter(group=group).order_by(
+            '-pub_date').values_list('pk', flat=True).first()
+        GroupStats.objects.update_or_create(
+            group=group,
+            defaults={'post_count': group.total, 'latest_post_id': latest})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_group_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
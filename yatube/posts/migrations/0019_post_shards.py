@@ -0,0 +1,69 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:54
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import migrations, models
+from django.db.models import Max
+import django.db.models.deletion
+
+
+def seed_sharded_ids(apps, schema_editor):
+    # Новые id не должны совпасть с id уже существующих постов и
+    # комментариев (posts.sharding.seed_ids).
+    connection = schema_editor.connection
+    if connection.alias != 'default':
+        return
+    floor = max(
+        apps.get_model('posts', name).objects.aggregate(
+            latest=Max('pk'))['latest'] or 0
+        for name in ('Post', 'Comment', 'ArchivedPost', 'ArchivedComment'))
+    if not floor:
+        return
+    ShardedId = apps.get_model('posts', 'ShardedId')
+    marker = ShardedId.objects.create(pk=floor, author_id=0)
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [ShardedId]):
+            cursor.execute(sql)
+    marker.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_archived_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardedId',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author_id', models.IntegerField(verbose_name='id автора поста')),
+            ],
+            options={
+                'verbose_name': 'id шардированной записи',
+                'verbose_name_plural': 'id шардированных записей',
+            },
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, help_text='Автор', on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='groupstats',
+            name='latest_post',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='posts.Post', verbose_name='Последний пост'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='author',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Группа, к которой будет относиться пост', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.Group', verbose_name='Группа'),
+        ),
+        migrations.RunPython(seed_sharded_ids, migrations.RunPython.noop),
+    ]
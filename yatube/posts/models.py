@@ -20,6 +20,20 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
+class ShardedQuerySet(models.QuerySet):
+    """create() без явной базы пишет туда, куда роутер направит объект.
+
+    Обычный QuerySet.create выбирает базу по модели, а шард поста
+    известен только по самому объекту (posts.sharding).
+    """
+
+    def create(self, **kwargs):
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=self._db)
+        return obj
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста', help_text='Введите текст поста'
@@ -27,6 +41,8 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата публикации'
     )
+    # Пост может лежать на другом шарде, чем автор и группа
+    # (posts.sharding), поэтому ограничения внешних ключей в базе нет.
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -47,11 +63,20 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    views = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False)
+    updated = models.DateTimeField('Изменён', auto_now=True)
+
+    objects = ShardedQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'], name='post_author_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -69,6 +94,8 @@ class Comment(CreatedModel):
         related_name='comments')
     text = models.TextField('Комментарий')
 
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ('created',)
         verbose_name = 'Комментарий'
@@ -96,3 +123,163 @@ class Follow(models.Model):
             UniqueConstraint(
                 fields=['user', 'author'], name='unique_subscription'),
         ]
+
+
+class FollowSuggestion(models.Model):
+    """Рекомендации «Кого почитать», рассчитанные командой
+    recommend_follows.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='follow_suggestion',
+        verbose_name='Читатель')
+    authors = models.TextField(
+        'Рекомендованные авторы', help_text='id авторов через запятую')
+    updated = models.DateTimeField('Дата расчёта', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+
+    def __str__(self):
+        return 'Suggestions for {}'.format(self.user_id)
+
+    @property
+    def author_ids(self):
+        return [int(pk) for pk in self.authors.split(',') if pk]
+
+
+class TrendingScore(models.Model):
+    """Затухающая оценка активности поста или группы (см. posts.trending)."""
+    POST = 'post'
+    GROUP = 'group'
+    KIND_CHOICES = (
+        (POST, 'Пост'),
+        (GROUP, 'Группа'),
+    )
+
+    kind = models.CharField('Тип', max_length=5, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField('id объекта')
+    score = models.FloatField('Оценка на момент обновления', default=0)
+    updated = models.DateTimeField('Дата обновления')
+
+    class Meta:
+        verbose_name = 'Оценка популярности'
+        verbose_name_plural = 'Оценки популярности'
+        constraints = [
+            UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_trending_object'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['kind', '-updated'], name='trending_kind_updated_idx'),
+        ]
+
+    def __str__(self):
+        return '{} {}: {:.2f}'.format(self.kind, self.object_id, self.score)
+
+
+class GroupStats(models.Model):
+    """Денормализованные счётчики группы для каталога групп.
+
+    Обновляются сигналами при создании, переносе и удалении постов.
+    """
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа')
+    post_count = models.PositiveIntegerField('Число постов', default=0)
+    # Пост может лежать на другом шарде; при его удалении ссылку
+    # обновляет group_stats.post_removed.
+    latest_post = models.ForeignKey(
+        Post,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+        blank=True,
+        null=True,
+        verbose_name='Последний пост',
+        db_constraint=False)
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+    def __str__(self):
+        return 'Stats for {}'.format(self.group_id)
+
+
+class ShardedId(models.Model):
+    """Выдаёт id постам и комментариям, когда шардов несколько.
+
+    Хранит автора поста: по нему posts.sharding находит шард по id.
+    """
+    author_id = models.IntegerField('id автора поста')
+
+    class Meta:
+        verbose_name = 'id шардированной записи'
+        verbose_name_plural = 'id шардированных записей'
+
+    def __str__(self):
+        return '{} -> {}'.format(self.pk, self.author_id)
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из Post командой archive_posts.
+
+    id сохраняется, поэтому прежний адрес поста продолжает работать.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор')
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='Группа')
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    views = models.PositiveIntegerField('Просмотры', default=0)
+    updated = models.DateTimeField('Изменён')
+    archived = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор')
+    text = models.TextField('Комментарий')
+    created = models.DateTimeField('Дата создания')
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return 'Comment by {} on {}'.format(self.author, self.post)
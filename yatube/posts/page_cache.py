@@ -0,0 +1,44 @@
+"""Версии общих для всех пользователей тел страниц.
+
+Тело страницы (список постов профиля, пост с комментариями) кэшируется
+тегом ``{% cache %}`` с ключом, в который входит строка версий из
+``versions()``. Персональные фрагменты — шапка, кнопка подписки, форма
+комментария — рендерятся вне кэша или отдаются отдельным запросом
+(posts:fragment). Изменение данных увеличивает версию, и старые тела
+просто перестают читаться. Начальная версия берётся из часов, чтобы
+после вытеснения ключа версии не вернуться к уже использованному числу.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'page_version:{}'
+GLOBAL = 'posts'
+
+
+def author_scope(author_id):
+    return 'author:{}'.format(author_id)
+
+
+def post_scope(post_id):
+    return 'post:{}'.format(post_id)
+
+
+def versions(*scopes):
+    """Строка версий для ключа кэша; общая версия GLOBAL входит всегда."""
+    keys = [VERSION_KEY.format(scope) for scope in (GLOBAL,) + scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return '.'.join(str(found[key]) for key in keys)
+
+
+def bump(*scopes):
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
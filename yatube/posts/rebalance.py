@@ -0,0 +1,84 @@
+"""Перенос постов на шарды их авторов после изменения POST_SHARDS.
+
+Согласованное хеширование (posts.sharding) переназначает часть авторов
+на другие шарды, а их посты с комментариями остаются на прежних. Перенос
+идёт пакетами по SHARD_MOVE_BATCH_SIZE постов, каждый пакет — в
+транзакциях на обоих шардах. Это не удаление поста: id сохраняются,
+сигналы не отправляются и счётчики групп не меняются. Перенесённым
+постам и комментариям создаются строки ShardedId, чтобы их шард
+находился по id.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from . import sharding
+from .cached import post_cache
+from .models import Comment, Post, ShardedId
+
+
+def misplaced_authors(alias):
+    """Авторы постов на шарде ``alias``, которым место на другом шарде."""
+    author_ids = Post.objects.using(alias).order_by().values_list(
+        'author_id', flat=True).distinct()
+    return {
+        author_id: sharding.shard_for_author(author_id)
+        for author_id in author_ids
+        if sharding.shard_for_author(author_id) != alias}
+
+
+def copy_rows(objs, using):
+    """Вставляет объекты как есть: bulk_create перезаписал бы pub_date,
+    updated и created (auto_now).
+    """
+    if not objs:
+        return
+    model = type(objs[0])
+    fields = model._meta.concrete_fields
+    size = connections[using].ops.bulk_batch_size(fields, objs) or len(objs)
+    for start in range(0, len(objs), size):
+        model._base_manager.using(using)._insert(
+            objs[start:start + size], fields=fields, raw=True)
+
+
+def move_batch(author_id, source, target, batch_size):
+    """Переносит пакет постов автора с ``source`` на ``target``.
+    Возвращает число перенесённых постов.
+    """
+    with transaction.atomic(using=target), transaction.atomic(using=source):
+        ids = list(Post.objects.using(source).filter(
+            author_id=author_id).values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        posts = Post.objects.using(source).filter(pk__in=ids)
+        comments = Comment.objects.using(source).filter(post_id__in=ids)
+        comment_list = list(comments)
+        copy_rows(list(posts), target)
+        copy_rows(comment_list, target)
+        ShardedId.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+            (ShardedId(pk=pk, author_id=author_id) for pk in
+             ids + [comment.pk for comment in comment_list]),
+            ignore_conflicts=True)
+        # Без сигналов: пост не удалён, а переехал.
+        comments._raw_delete(source)
+        posts._raw_delete(source)
+    post_cache.invalidate(*ids)
+    return len(ids)
+
+
+def rebalance(batch_size=None, sources=()):
+    """Переносит на шарды авторов посты с POST_SHARDS и выведенных из
+    него шардов ``sources``. Возвращает число перенесённых постов.
+    """
+    batch_size = batch_size or settings.SHARD_MOVE_BATCH_SIZE
+    aliases = sharding.shards() + tuple(
+        alias for alias in sources if alias not in sharding.shards())
+    sharding.seed_ids(aliases)
+    total = 0
+    for source in aliases:
+        for author_id, target in misplaced_authors(source).items():
+            while True:
+                moved = move_batch(author_id, source, target, batch_size)
+                if not moved:
+                    break
+                total += moved
+    return total
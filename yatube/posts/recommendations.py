@@ -0,0 +1,125 @@
+"""Пакетный расчёт рекомендаций «Кого почитать» по графу подписок.
+
+Граф хранится как пара массивов (подписчик, автор). Считаются две оценки:
+
+* друзья друзей — авторы, на которых подписаны мои авторы (u → a → b);
+* совместные подписки — авторы, на которых подписаны другие читатели
+  моих авторов (u → a ← v → b).
+
+Все шаги векторизованы на NumPy и выполняются порциями по читателям,
+чтобы ограничить память. Веер на каждом шаге обрезается (``fanout``),
+иначе у популярных авторов число путей растёт квадратично.
+"""
+import numpy as np
+
+FOF_WEIGHT = 2.0
+COFOLLOW_WEIGHT = 1.0
+
+
+class Adjacency:
+    """Список смежности в формате CSR над компактными индексами узлов."""
+
+    def __init__(self, src, dst, size):
+        order = np.argsort(src, kind='stable')
+        self.targets = dst[order]
+        self.degree = np.bincount(src, minlength=size)
+        self.indptr = np.concatenate(([0], np.cumsum(self.degree)))
+
+    def expand(self, nodes, fanout):
+        """Для каждого узла возвращает (номер узла в nodes, сосед)."""
+        counts = np.minimum(self.degree[nodes], fanout)
+        total = int(counts.sum())
+        owners = np.repeat(np.arange(len(nodes)), counts)
+        offsets = np.arange(total) - np.repeat(
+            np.cumsum(counts) - counts, counts)
+        return owners, self.targets[self.indptr[nodes][owners] + offsets]
+
+
+def top_k_pairs(users, candidates, scores, k):
+    """Оставляет для каждого читателя k кандидатов с наибольшей оценкой."""
+    order = np.lexsort((-scores, users))
+    users, candidates, scores = (
+        users[order], candidates[order], scores[order])
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    rank = np.arange(len(users)) - np.repeat(
+        starts, np.diff(np.r_[starts, len(users)]))
+    keep = rank < k
+    return users[keep], candidates[keep], scores[keep]
+
+
+def score_chunk(chunk, following, followers, size, fanout, peer_fanout):
+    """Оценки (читатель, кандидат) для порции читателей."""
+    owner, followed = following.expand(chunk, following.degree.max())
+    known = chunk[owner] * size + followed
+
+    seed_owner, seeds = following.expand(chunk, fanout)
+    readers = chunk[seed_owner]
+
+    owner, fof = following.expand(seeds, fanout)
+    fof_readers = readers[owner]
+
+    owner, peers = followers.expand(seeds, peer_fanout)
+    peer_readers = readers[owner]
+    owner, cofollow = following.expand(peers, peer_fanout)
+    cofollow_readers = peer_readers[owner]
+
+    keys = np.concatenate((
+        fof_readers * size + fof,
+        cofollow_readers * size + cofollow,
+    ))
+    weights = np.concatenate((
+        np.full(len(fof), FOF_WEIGHT),
+        np.full(len(cofollow), COFOLLOW_WEIGHT),
+    ))
+    keys, inverse = np.unique(keys, return_inverse=True)
+    scores = np.bincount(inverse, weights=weights)
+
+    users, candidates = np.divmod(keys, size)
+    keep = (users != candidates) & ~np.isin(keys, known)
+    return users[keep], candidates[keep], scores[keep]
+
+
+def compute_suggestions(follower_ids, author_ids, k=10, fanout=20,
+                        peer_fanout=10, chunk_size=2000):
+    """Возвращает словарь {user_id: [author_id, ...]} с top-k кандидатами.
+
+    ``follower_ids`` и ``author_ids`` — параллельные массивы рёбер Follow.
+    """
+    follower_ids = np.asarray(follower_ids, dtype=np.int64)
+    author_ids = np.asarray(author_ids, dtype=np.int64)
+    if not len(follower_ids):
+        return {}
+    nodes, inverse = np.unique(
+        np.concatenate((follower_ids, author_ids)), return_inverse=True)
+    size = len(nodes)
+    src, dst = inverse[:len(follower_ids)], inverse[len(follower_ids):]
+    following = Adjacency(src, dst, size)
+    followers = Adjacency(dst, src, size)
+
+    suggestions = {}
+    readers = np.unique(src)
+    for start in range(0, len(readers), chunk_size):
+        users, candidates, scores = score_chunk(
+            readers[start:start + chunk_size],
+            following, followers, size, fanout, peer_fanout)
+        users, candidates, _ = top_k_pairs(users, candidates, scores, k)
+        boundaries = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+        for group in np.split(np.arange(len(users)), boundaries[1:]):
+            if len(group):
+                suggestions[int(nodes[users[group[0]]])] = (
+                    nodes[candidates[group]].tolist())
+    return suggestions
+
+
+def synthetic_graph(edges, users, seed=0):
+    """Случайный граф подписок со степенным распределением популярности."""
+    rng = np.random.default_rng(seed)
+    drawn = int(edges * 1.5)
+    followers = rng.integers(1, users + 1, size=drawn)
+    authors = np.minimum(
+        (rng.pareto(1.2, size=drawn) * 10).astype(np.int64) + 1, users)
+    keep = followers != authors
+    pairs = np.unique(
+        np.stack((followers[keep], authors[keep]), axis=1), axis=0)
+    pairs = pairs[rng.permutation(len(pairs))[:edges]]
+    return pairs[:, 0], pairs[:, 1]
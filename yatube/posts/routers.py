@@ -0,0 +1,50 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from . import sharding
+from .models import Comment, Post, User
+
+SHARDED_MODELS = ('post', 'comment')
+
+
+class AuthorShardRouter:
+    """Направляет Post и Comment на шард автора поста (posts.sharding).
+
+    Запросы без объекта-подсказки (Post.objects.filter(...)) идут в
+    default и не видят других шардов: ленты и счётчики обходят шарды
+    через sharding.fan_out, админка выбирает шард фильтром
+    (posts.admin.ShardedModelAdmin). Связанные объекты из других моделей
+    читаются из default.
+    """
+
+    def db_for_read(self, model, instance=None, **hints):
+        if instance is None:
+            return None
+        if model not in (Post, Comment):
+            # Автор или группа поста с шарда лежат в default.
+            if isinstance(instance, (Post, Comment)):
+                return DEFAULT_DB_ALIAS
+            return None
+        if isinstance(instance, (Post, Comment)) and instance._state.db:
+            return instance._state.db
+        if isinstance(instance, Post):
+            return sharding.shard_for_author(instance.author_id)
+        if isinstance(instance, Comment):
+            if Comment.post.is_cached(instance):
+                return self.db_for_read(Post, instance=instance.post)
+            return sharding.shard_for_post(instance.post_id)
+        if isinstance(instance, User) and model is Post:
+            return sharding.shard_for_author(instance.pk)
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if isinstance(obj1, (Post, Comment)) or isinstance(
+                obj2, (Post, Comment)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS:
+            return None
+        return app_label == 'posts' and model_name in SHARDED_MODELS
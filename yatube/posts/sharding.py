@@ -0,0 +1,185 @@
+"""Шардирование постов и комментариев по автору.
+
+Посты автора лежат на одном из алиасов POST_SHARDS, выбранном
+согласованным хешированием author_id: у каждого шарда
+SHARD_VIRTUAL_NODES точек на кольце, поэтому новый шард забирает лишь
+часть авторов. Комментарии лежат на шарде своего поста. Пока шард один
+(по умолчанию ['default']), всё работает как без шардирования.
+
+При нескольких шардах id постам и комментариям выдаёт таблица ShardedId
+в default: id остаются уникальными между базами, а шард поста находится
+по его id без опроса всех баз. Ленты опрашивают шарды параллельно
+(fan_out) и сливают результаты по pub_date.
+
+Посты, созданные до включения шардов, лежат в default и не имеют строк
+ShardedId; seed_ids поднимает счётчик выше их id. После изменения
+POST_SHARDS посты переносит на новые шарды команда rebalance_shards
+(posts.rebalance).
+"""
+import bisect
+import hashlib
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post, ShardedId
+
+OWNER_KEY = 'shard:owner:{}'
+
+_rings = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def hash_key(value):
+    return int.from_bytes(
+        hashlib.md5(str(value).encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    def __init__(self, nodes, replicas):
+        self.nodes = tuple(nodes)
+        points = sorted(
+            (hash_key('{}#{}'.format(node, index)), node)
+            for node in self.nodes for index in range(replicas))
+        self.points = [point for point, _ in points]
+        self.owners = [node for _, node in points]
+
+    def node(self, key):
+        if len(self.nodes) == 1:
+            return self.nodes[0]
+        index = bisect.bisect(self.points, hash_key(key))
+        return self.owners[index % len(self.points)]
+
+
+def shards():
+    return tuple(settings.POST_SHARDS)
+
+
+def is_sharded():
+    return len(settings.POST_SHARDS) > 1
+
+
+def ring():
+    nodes = shards()
+    key = (nodes, settings.SHARD_VIRTUAL_NODES)
+    if key not in _rings:
+        _rings[key] = HashRing(nodes, settings.SHARD_VIRTUAL_NODES)
+    return _rings[key]
+
+
+def shard_for_author(author_id):
+    return ring().node(author_id)
+
+
+def shards_for_authors(author_ids):
+    """Шарды, на которых лежат посты авторов, в порядке POST_SHARDS."""
+    used = {shard_for_author(author_id) for author_id in author_ids}
+    return tuple(alias for alias in shards() if alias in used)
+
+
+def allocate_id(author_id):
+    """Новый id поста или комментария на шарде автора ``author_id``."""
+    sharded_id = ShardedId.objects.using(DEFAULT_DB_ALIAS).create(
+        author_id=author_id)
+    cache.set(OWNER_KEY.format(sharded_id.pk), author_id, None)
+    return sharded_id.pk
+
+
+def max_pk(queryset):
+    return queryset.aggregate(latest=Max('pk'))['latest'] or 0
+
+
+def seed_ids(aliases=None):
+    """Поднимает счётчик ShardedId выше id постов и комментариев на
+    шардах ``aliases`` и в архиве, чтобы новые id не совпали с выданными
+    без него.
+    """
+    archived = [max_pk(ArchivedPost.objects), max_pk(ArchivedComment.objects)]
+    floor = max(archived + fan_out(lambda alias: max(
+        max_pk(Post.objects.using(alias)),
+        max_pk(Comment.objects.using(alias))), aliases))
+    sequence = ShardedId.objects.using(DEFAULT_DB_ALIAS)
+    if not floor or sequence.filter(pk__gte=floor).exists():
+        return
+    connection = connections[DEFAULT_DB_ALIAS]
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        # Строка-метка сдвигает счётчик (AUTOINCREMENT в SQLite, setval
+        # в PostgreSQL) и удаляется: у легаси-постов строк ShardedId нет.
+        marker = sequence.create(pk=floor, author_id=0)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [ShardedId]):
+                cursor.execute(sql)
+        marker.delete()
+
+
+def shard_for_post(post_id):
+    if not is_sharded():
+        return shards()[0]
+    key = OWNER_KEY.format(post_id)
+    author_id = cache.get(key)
+    if author_id is None:
+        author_id = ShardedId.objects.using(DEFAULT_DB_ALIAS).filter(
+            pk=post_id).values_list('author_id', flat=True).first()
+        if author_id is None:
+            # Посты, созданные до включения шардов, остались в default.
+            return DEFAULT_DB_ALIAS
+        cache.set(key, author_id, None)
+    return shard_for_author(author_id)
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SHARD_FANOUT_WORKERS,
+                thread_name_prefix='shard-fanout')
+    return _executor
+
+
+def fan_out(func, aliases=None):
+    """Список func(alias) по шардам ``aliases`` (по умолчанию — всем)."""
+    aliases = shards() if aliases is None else tuple(aliases)
+    if len(aliases) < 2 or any(
+            connections[alias].in_atomic_block for alias in aliases):
+        # Другие потоки не видят данные незавершённой транзакции.
+        return [func(alias) for alias in aliases]
+
+    def call(alias):
+        connections[alias].close_if_unusable_or_obsolete()
+        return func(alias)
+
+    return list(executor().map(call, aliases))
+
+
+def count(queryset, aliases=None):
+    return sum(fan_out(lambda alias: queryset.using(alias).count(), aliases))
+
+
+def page_ids(queryset, offset, limit, aliases=None):
+    """id постов ``queryset`` с ``offset`` по всем шардам, новые первыми.
+    """
+    aliases = shards() if aliases is None else tuple(aliases)
+    if len(aliases) == 1:
+        return tuple(queryset.using(aliases[0]).values_list(
+            'pk', flat=True)[offset:offset + limit])
+    ordered = queryset.order_by('-pub_date', '-pk')
+    rows = fan_out(lambda alias: list(ordered.using(alias).values_list(
+        'pub_date', 'pk')[:offset + limit]), aliases)
+    merged = heapq.merge(*rows, reverse=True)
+    return tuple(pk for _, pk in itertools.islice(
+        merged, offset, offset + limit))
+
+
+def newest_pk(queryset, aliases=None):
+    ids = page_ids(queryset, 0, 1, aliases)
+    return ids[0] if ids else None
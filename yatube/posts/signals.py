@@ -0,0 +1,214 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import DEFERRED
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.db import invalidate_on_commit
+
+from . import group_stats, page_cache, sharding
+from .cached import archived_post_cache, group_cache, post_cache
+from .feeds import INDEX_FEED, author_feed, bump_feeds, group_feed
+from .follows import followees_changed, invalidate_followees
+from .group_choices import invalidate_group_choices
+from .models import (
+    ArchivedPost, Comment, Follow, Group, GroupStats, Post, User)
+from .trending import queue_followed, queue_post_event
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_on_commit(
+        followees_changed, instance.user_id, using=instance._state.db)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        queue_followed([instance.author_id])
+
+
+@receiver(pre_save, sender=Post)
+def allocate_post_id(sender, instance, **kwargs):
+    if instance.pk is None and sharding.is_sharded():
+        instance.pk = sharding.allocate_id(instance.author_id)
+
+
+@receiver(pre_save, sender=Comment)
+def allocate_comment_id(sender, instance, **kwargs):
+    if instance.pk is None and sharding.is_sharded():
+        instance.pk = sharding.allocate_id(instance.post.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    using = instance._state.db
+    invalidate_on_commit(post_cache.invalidate, instance.pk, using=using)
+    invalidate_on_commit(
+        page_cache.bump, page_cache.author_scope(instance.author_id),
+        page_cache.post_scope(instance.pk), using=using)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        invalidate_on_commit(
+            bump_feeds, INDEX_FEED, author_feed(instance.author_id),
+            using=instance._state.db)
+        queue_post_event(instance, 'post')
+
+
+@receiver(post_init, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    # Отложенное поле не читаем, чтобы не делать лишний запрос.
+    instance._saved_group_id = instance.__dict__.get('group_id', DEFERRED)
+
+
+@receiver(post_save, sender=Post)
+def post_group_changed(sender, instance, created, **kwargs):
+    previous = None if created else instance._saved_group_id
+    if previous is DEFERRED or previous == instance.group_id:
+        return
+    using = instance._state.db
+    if previous is not None:
+        group_stats.post_removed(previous, instance.pk)
+        invalidate_on_commit(bump_feeds, group_feed(previous), using=using)
+    if instance.group_id is not None:
+        group_stats.post_added(instance.group_id, instance)
+        invalidate_on_commit(
+            bump_feeds, group_feed(instance.group_id), using=using)
+    instance._saved_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    using = instance._state.db
+    invalidate_on_commit(
+        bump_feeds, INDEX_FEED, author_feed(instance.author_id),
+        using=using)
+    if instance.group_id is not None:
+        group_stats.post_removed(instance.group_id, instance.pk)
+        invalidate_on_commit(
+            bump_feeds, group_feed(instance.group_id), using=using)
+
+
+@receiver(post_save, sender=Group)
+def group_created(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_saved_or_deleted(sender, instance, **kwargs):
+    using = instance._state.db
+    invalidate_on_commit(group_cache.invalidate, instance.pk, using=using)
+    invalidate_on_commit(invalidate_group_choices, using=using)
+
+
+def touch_posts(posts, archived):
+    """Обновляет updated у постов на всех шардах и сбрасывает их и
+    архивные посты из кэша объектов.
+    """
+    now = timezone.now()
+    for alias in sharding.shards():
+        sharded = posts.using(alias)
+        sharded.update(updated=now)
+        invalidate_on_commit(
+            post_cache.invalidate, *sharded.values_list('pk', flat=True),
+            using=alias)
+    invalidate_on_commit(
+        archived_post_cache.invalidate,
+        *archived.values_list('pk', flat=True), using=DEFAULT_DB_ALIAS)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    # SET_NULL каскад ORM обновляет посты только в базе группы.
+    for alias in sharding.shards():
+        posts = Post.objects.using(alias).filter(group_id=instance.pk)
+        ids = list(posts.values_list('pk', flat=True))
+        posts.update(group=None)
+        invalidate_on_commit(post_cache.invalidate, *ids, using=alias)
+
+
+@receiver(post_save, sender=Group)
+def group_changed(sender, instance, created, **kwargs):
+    # Карточки постов кэшируются по (id, updated) и показывают slug группы.
+    if not created:
+        touch_posts(
+            Post.objects.filter(group=instance),
+            ArchivedPost.objects.filter(group=instance))
+        invalidate_on_commit(
+            page_cache.bump, page_cache.GLOBAL, using=instance._state.db)
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def archived_post_deleted(sender, instance, **kwargs):
+    invalidate_on_commit(
+        archived_post_cache.invalidate, instance.pk,
+        using=instance._state.db)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate_on_commit(
+        page_cache.bump, page_cache.post_scope(instance.post_id),
+        using=instance._state.db)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        queue_post_event(instance.post, 'comment')
+
+
+AUTHOR_CARD_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def author_card(user):
+    # Отложенное поле не читаем, чтобы не делать лишний запрос.
+    return tuple(user.__dict__.get(name, DEFERRED)
+                 for name in AUTHOR_CARD_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_author_card(sender, instance, **kwargs):
+    instance._saved_card = author_card(instance)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, **kwargs):
+    # Смена пароля, вход (last_login) и прочие правки не меняют карточки
+    # постов: обновляем их, только если изменилось имя автора.
+    card = author_card(instance)
+    previous = getattr(instance, '_saved_card', None)
+    instance._saved_card = card
+    if created or card == previous:
+        return
+    touch_posts(
+        Post.objects.filter(author=instance),
+        ArchivedPost.objects.filter(author=instance))
+    invalidate_on_commit(
+        page_cache.bump, page_cache.author_scope(instance.pk),
+        using=instance._state.db)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    # SQLite может переиспользовать id удалённого пользователя.
+    if created:
+        invalidate_followees(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_posts(sender, instance, **kwargs):
+    # Каскад ORM удаляет посты и комментарии только в базе пользователя.
+    for alias in sharding.shards():
+        if alias != instance._state.db:
+            Comment.objects.using(alias).filter(author=instance).delete()
+            Post.objects.using(alias).filter(author=instance).delete()
@@ -0,0 +1,21 @@
+from django.utils.dateparse import parse_datetime
+
+from core.tasks import task
+from .trending import (
+    bump_followed, bump_post, refresh_trending, schedule_refresh)
+
+
+@task(name='posts.bump_trending')
+def bump_post_task(post_id, group_id, event, at):
+    bump_post(post_id, group_id, event, parse_datetime(at))
+
+
+@task(name='posts.bump_followed')
+def bump_followed_task(author_ids, at):
+    bump_followed(author_ids, parse_datetime(at))
+
+
+@task(name='posts.refresh_trending')
+def refresh_trending_task():
+    refresh_trending()
+    schedule_refresh()
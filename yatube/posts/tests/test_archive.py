@@ -0,0 +1,86 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Group, GroupStats, Post)
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.old = Post.objects.create(
+            author=ArchiveTests.author, text='Старый пост',
+            group=ArchiveTests.group)
+        Post.objects.filter(pk=self.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=400), views=7)
+        self.comment = Comment.objects.create(
+            post=self.old, author=ArchiveTests.author, text='Комментарий')
+        self.fresh = Post.objects.create(
+            author=ArchiveTests.author, text='Новый пост',
+            group=ArchiveTests.group)
+
+    def test_old_posts_are_moved_with_comments(self):
+        moved = archive_posts(timezone.now() - timedelta(days=365))
+
+        self.assertEqual(moved, 1)
+        self.assertEqual(list(Post.objects.all()), [self.fresh])
+        self.assertFalse(Comment.objects.exists())
+        archived = ArchivedPost.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.text, 'Старый пост')
+        self.assertEqual(archived.views, 7)
+        self.assertEqual(archived.group, ArchiveTests.group)
+        self.assertEqual(
+            ArchivedComment.objects.get(pk=self.comment.pk).post, archived)
+
+    def test_command_moves_in_batches(self):
+        for _ in range(4):
+            post = Post.objects.create(
+                author=ArchiveTests.author, text='Ещё старый')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=400))
+
+        call_command('archive_posts', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(ArchivedPost.objects.count(), 5)
+        self.assertEqual(list(Post.objects.all()), [self.fresh])
+
+    def test_archived_post_url_keeps_working(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.old.pk})
+        Client().get(url)
+        archive_posts(timezone.now() - timedelta(days=365))
+
+        response = Client().get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Старый пост')
+        self.assertContains(response, 'Комментарий')
+        self.assertNotIn('form', response.context)
+
+    def test_archived_post_leaves_feeds(self):
+        Client().get(reverse('posts:index'))
+        archive_posts(timezone.now() - timedelta(days=365))
+
+        response = Client().get(
+            reverse('posts:group_list', kwargs={'slug': 'group'}))
+
+        self.assertEqual(list(response.context['page_obj']), [self.fresh])
+        self.assertEqual(
+            GroupStats.objects.get(group=ArchiveTests.group).post_count, 1)
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Первая', slug='first', description='Описание')
+        cls.other_group = Group.objects.create(
+            title='Вторая', slug='second', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=FeedCacheTests.author, text='Старый текст',
+            group=FeedCacheTests.group)
+        self.group_url = reverse(
+            'posts:group_list', kwargs={'slug': 'first'})
+
+    def test_cached_feed_page_needs_no_queries(self):
+        """Повторная страница ленты собирается целиком из кэша."""
+        response = Client().get(self.group_url)
+        self.assertIsInstance(response.context['page_obj'], Page)
+
+        with self.assertNumQueries(0):
+            response = Client().get(self.group_url)
+
+        self.assertEqual(
+            list(response.context['page_obj']), [self.post])
+
+    def test_edit_reloads_only_the_post(self):
+        """Правка поста не сбрасывает список id: перечитывается только
+        сам пост.
+        """
+        Client().get(self.group_url)
+        self.post.text = 'Новый текст'
+        self.post.save()
+
+        with self.assertNumQueries(1):
+            response = Client().get(self.group_url)
+
+        self.assertContains(response, 'Новый текст')
+
+    def test_new_and_moved_posts_change_feeds(self):
+        """Новый пост и перенос в другую группу меняют нужные ленты."""
+        client = Client()
+        client.force_login(FeedCacheTests.reader)
+        Follow.objects.create(
+            user=FeedCacheTests.reader, author=FeedCacheTests.author)
+        for url in (reverse('posts:index'), reverse('posts:follow_index')):
+            client.get(url)
+        new_post = Post.objects.create(
+            author=FeedCacheTests.author, text='Новый пост')
+        self.post.group = FeedCacheTests.other_group
+        self.post.save()
+
+        for url in (reverse('posts:index'), reverse('posts:follow_index')):
+            with self.subTest(url=url):
+                page = client.get(url).context['page_obj']
+                self.assertEqual(list(page), [new_post, self.post])
+        self.assertEqual(
+            list(client.get(self.group_url).context['page_obj']), [])
+        moved = client.get(
+            reverse('posts:group_list', kwargs={'slug': 'second'}))
+        self.assertEqual(list(moved.context['page_obj']), [self.post])
@@ -0,0 +1,127 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.follows import is_following
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class FollowApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(FollowApiTests.reader)
+
+    def follow_url(self, username='author'):
+        return reverse('posts:api_follow', kwargs={'username': username})
+
+    def bulk(self, data):
+        return self.client.post(
+            reverse('posts:api_follow_bulk'), json.dumps(data),
+            content_type='application/json')
+
+    def test_follow_is_idempotent_and_returns_state(self):
+        for _ in range(2):
+            response = self.client.post(self.follow_url())
+            self.assertEqual(response.json(), {
+                'author': 'author',
+                'following': True,
+                'followers': 1,
+                'followees': 1,
+            })
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_follow_does_not_render_feed(self):
+        response = self.client.post(self.follow_url())
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertFalse(response.templates)
+
+    def test_unfollow(self):
+        self.client.post(self.follow_url())
+
+        response = self.client.post(
+            reverse('posts:api_unfollow', kwargs={'username': 'author'}))
+
+        self.assertFalse(response.json()['following'])
+        self.assertEqual(response.json()['followers'], 0)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_follow_updates_follow_feed(self):
+        self.client.get(reverse('posts:follow_index'))
+        self.client.post(self.follow_url())
+
+        response = self.client.get(reverse('posts:follow_index'))
+
+        self.assertEqual(
+            list(response.context['page_obj']), [FollowApiTests.post])
+
+    def test_post_and_csrf_are_required(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(FollowApiTests.reader)
+
+        self.assertEqual(client.get(self.follow_url()).status_code, 405)
+        self.assertEqual(client.post(self.follow_url()).status_code, 403)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_anonymous_gets_401(self):
+        response = Client().post(self.follow_url())
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_bulk_follow_and_unfollow(self):
+        Follow.objects.create(
+            user=FollowApiTests.reader, author=FollowApiTests.other)
+
+        response = self.bulk({
+            'follow': ['author', 'author', 'reader', 'ghost'],
+            'unfollow': ['other'],
+        })
+
+        self.assertEqual(response.json(), {
+            'followed': ['author'],
+            'unfollowed': ['other'],
+            'unknown': ['ghost'],
+            'followees': 1,
+        })
+        reader = FollowApiTests.reader.pk
+        self.assertTrue(is_following(reader, FollowApiTests.author.pk))
+        self.assertFalse(is_following(reader, FollowApiTests.other.pk))
+
+    def test_bulk_unfollow_lists_only_removed_authors(self):
+        Follow.objects.create(
+            user=FollowApiTests.reader, author=FollowApiTests.other)
+
+        response = self.bulk({'unfollow': ['other', 'author', 'other']})
+
+        self.assertEqual(response.json()['followed'], [])
+        self.assertEqual(response.json()['unfollowed'], ['other'])
+
+    def test_bulk_rejects_bad_payload(self):
+        response = self.client.post(
+            reverse('posts:api_follow_bulk'), 'не json',
+            content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.bulk({'follow': [1]}).status_code, 400)
+        self.assertEqual(self.bulk(['author']).status_code, 400)
+
+    def test_bulk_requires_lists_of_names(self):
+        for data in ({'follow': 'author'}, {'unfollow': 'other'},
+                     {'follow': {'author': True}}, {'follow': None}):
+            with self.subTest(data=data):
+                self.assertEqual(self.bulk(data).status_code, 400)
+
+        self.assertFalse(Follow.objects.exists())
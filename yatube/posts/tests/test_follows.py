@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.follows import get_followee_ids, is_following
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class FolloweesCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other_author = User.objects.create_user(username='other')
+        Post.objects.create(author=cls.author, text='Пост автора')
+        Post.objects.create(author=cls.other_author, text='Пост другого')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FolloweesCacheTests.reader)
+
+    def test_followees_are_served_from_cache(self):
+        """Повторный запрос подписок не обращается к базе."""
+        Follow.objects.create(
+            user=FolloweesCacheTests.reader,
+            author=FolloweesCacheTests.author)
+        get_followee_ids(FolloweesCacheTests.reader.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(is_following(
+                FolloweesCacheTests.reader.pk, FolloweesCacheTests.author.pk))
+            self.assertFalse(is_following(
+                FolloweesCacheTests.reader.pk,
+                FolloweesCacheTests.other_author.pk))
+
+    def test_follow_and_unfollow_invalidate_cache(self):
+        """Подписка и отписка сбрасывают кэш читателя."""
+        reader = FolloweesCacheTests.reader
+        author = FolloweesCacheTests.author
+        self.assertEqual(list(get_followee_ids(reader.pk)), [])
+
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'}))
+        self.assertEqual(list(get_followee_ids(reader.pk)), [author.pk])
+
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertEqual(list(get_followee_ids(reader.pk)), [])
+
+    def test_follow_index_uses_cached_followees(self):
+        """Лента подписок строится по закэшированному списку авторов."""
+        Follow.objects.create(
+            user=FolloweesCacheTests.reader,
+            author=FolloweesCacheTests.author)
+
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+
+        self.assertEqual(
+            [post.author for post in response.context['page_obj']],
+            [FolloweesCacheTests.author])
@@ -0,0 +1,94 @@
+from django import forms
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.forms import PostForm
+from posts.group_choices import (
+    GROUP_CHOICES_VERSION_KEY, get_group_choices)
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class GroupChoicesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(
+            title='Первая группа', slug='first', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+
+    def group_queries(self, func):
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return [query['sql'] for query in context.captured_queries
+                if 'FROM "posts_group"' in query['sql']]
+
+    def test_form_renders_choices_from_cache(self):
+        """Повторная отрисовка поля group не обращается к базе."""
+        str(PostForm()['group'])
+
+        with self.assertNumQueries(0):
+            rendered = str(PostForm()['group'])
+
+        self.assertIn('Первая группа', rendered)
+        self.assertEqual(
+            type(PostForm().fields['group']), forms.ModelChoiceField)
+
+    def test_group_changes_invalidate_choices(self):
+        """Новая, переименованная и удалённая группа видны сразу."""
+        get_group_choices()
+        other = Group.objects.create(
+            title='Вторая', slug='second', description='Описание')
+        self.assertIn((other.pk, 'Вторая'), get_group_choices())
+
+        other.title = 'Переименована'
+        other.save()
+        self.assertIn((other.pk, 'Переименована'), get_group_choices())
+
+        other.delete()
+        self.assertEqual(
+            get_group_choices(),
+            ((GroupChoicesTests.group.pk, 'Первая группа'),))
+
+    def test_evicted_version_does_not_revive_old_choices(self):
+        """После вытеснения ключа версии старые варианты не читаются."""
+        get_group_choices()
+        group = Group.objects.create(
+            title='Вторая группа', slug='second', description='Описание')
+        cache.delete(GROUP_CHOICES_VERSION_KEY)
+
+        self.assertIn((group.pk, group.title), get_group_choices())
+
+    def test_form_still_validates_against_database(self):
+        """Выбор группы проверяется по базе, а не по кэшу."""
+        form = PostForm(data={
+            'text': 'Пост', 'group': GroupChoicesTests.group.pk})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], GroupChoicesTests.group)
+
+        form = PostForm(data={'text': 'Пост', 'group': 9999})
+        self.assertFalse(form.is_valid())
+
+    def test_admin_changelist_does_not_query_groups_per_row(self):
+        """Строки list_editable в админке берут варианты из кэша."""
+        for number in range(3):
+            Post.objects.create(
+                author=GroupChoicesTests.admin, text=f'Пост {number}',
+                group=GroupChoicesTests.group)
+        client = Client()
+        client.force_login(GroupChoicesTests.admin)
+        get_group_choices()
+
+        queries = self.group_queries(lambda: client.get(
+            reverse('admin:posts_post_changelist')))
+
+        self.assertEqual(queries, [])
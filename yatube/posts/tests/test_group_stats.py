@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.group_stats import rebuild_group_stats
+from posts.models import Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Первая группа', slug='first', description='Описание')
+        cls.other_group = Group.objects.create(
+            title='Вторая группа', slug='second', description='Описание')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(GroupStatsTests.user)
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_new_post_updates_counters(self):
+        """Новый пост увеличивает счётчик и становится последним."""
+        Post.objects.create(
+            author=GroupStatsTests.user, text='Старый',
+            group=GroupStatsTests.group)
+        post = Post.objects.create(
+            author=GroupStatsTests.user, text='Новый',
+            group=GroupStatsTests.group)
+
+        stats = self.stats(GroupStatsTests.group)
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(stats.latest_post, post)
+
+    def test_moving_post_between_groups(self):
+        """Перенос поста через форму переносит и счётчики."""
+        post = Post.objects.create(
+            author=GroupStatsTests.user, text='Пост',
+            group=GroupStatsTests.group)
+
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': 'Пост', 'group': GroupStatsTests.other_group.id})
+
+        self.assertEqual(self.stats(GroupStatsTests.group).post_count, 0)
+        self.assertIsNone(self.stats(GroupStatsTests.group).latest_post)
+        self.assertEqual(
+            self.stats(GroupStatsTests.other_group).post_count, 1)
+        self.assertEqual(
+            self.stats(GroupStatsTests.other_group).latest_post, post)
+
+    def test_deleting_latest_post_falls_back_to_previous(self):
+        """После удаления последнего поста последним становится
+        предыдущий.
+        """
+        older = Post.objects.create(
+            author=GroupStatsTests.user, text='Старый',
+            group=GroupStatsTests.group)
+        Post.objects.create(
+            author=GroupStatsTests.user, text='Новый',
+            group=GroupStatsTests.group).delete()
+
+        stats = self.stats(GroupStatsTests.group)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.latest_post, older)
+
+    def test_rebuild_matches_incremental_counters(self):
+        """Полный пересчёт даёт те же значения."""
+        Post.objects.create(
+            author=GroupStatsTests.user, text='Пост',
+            group=GroupStatsTests.group)
+        GroupStats.objects.update(post_count=42, latest_post=None)
+
+        rebuild_group_stats()
+
+        self.assertEqual(self.stats(GroupStatsTests.group).post_count, 1)
+
+    def test_group_index_reads_only_aggregates(self):
+        """Каталог групп не считает посты: два запроса на страницу."""
+        Post.objects.create(
+            author=GroupStatsTests.user, text='Пост',
+            group=GroupStatsTests.group)
+
+        with self.assertNumQueries(2):
+            response = Client().get(reverse('posts:group_index'))
+
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertContains(response, 'Всего постов: 1')
@@ -0,0 +1,131 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import live
+from posts.models import Post
+
+User = get_user_model()
+
+
+def drain(subscriber):
+    events = []
+    while not subscriber.events.empty():
+        events.append(subscriber.events.get_nowait())
+    return events
+
+
+class LiveHubTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        cache.clear()
+        self.hub = live.Hub()
+
+    def test_many_subscribers_cost_one_query_per_poll(self):
+        """1000 подписчиков: новый пост — один запрос к базе на процесс."""
+        index = [self.hub.subscribe() for _ in range(500)]
+        follow = [self.hub.subscribe({LiveHubTests.author.pk})
+                  for _ in range(500)]
+        Post.objects.create(author=LiveHubTests.author, text='Первый')
+        Post.objects.create(author=LiveHubTests.other, text='Второй')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.hub.poll(), 2)
+
+        for subscriber in index:
+            self.assertEqual([event['count'] for event in drain(subscriber)],
+                             [2])
+        for subscriber in follow:
+            self.assertEqual([event['count'] for event in drain(subscriber)],
+                             [1])
+
+    def test_unchanged_feed_is_not_queried(self):
+        self.hub.subscribe()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.hub.poll(), 0)
+
+    @override_settings(LIVE_BUFFER_SIZE=2)
+    def test_stale_cursor_loads_only_buffer(self):
+        self.hub = live.Hub()
+        self.hub.subscribe()
+        posts = [Post.objects.create(author=LiveHubTests.author, text=str(i))
+                 for i in range(5)]
+
+        self.assertEqual(self.hub.poll(), 2)
+
+        self.assertEqual([pk for pk, _ in self.hub.recent],
+                         [post.pk for post in posts[-2:]])
+        self.assertEqual(self.hub.cursor, posts[-1].pk)
+
+    def test_subscribe_respects_limit(self):
+        self.hub.subscribe(limit=1)
+
+        self.assertIsNone(self.hub.subscribe(limit=1))
+        self.assertEqual(len(self.hub.subscribers), 1)
+
+    def test_reconnect_gets_missed_posts_from_buffer(self):
+        self.hub.subscribe()
+        cursor = self.hub.cursor
+        post = Post.objects.create(author=LiveHubTests.author, text='Пост')
+        self.hub.poll()
+
+        with self.assertNumQueries(0):
+            event = self.hub.since(cursor, self.hub.subscribe())
+
+        self.assertEqual(event['count'], 1)
+        self.assertEqual(event['cursor'], post.pk)
+        event = self.hub.since(cursor, self.hub.subscribe(cards=True))
+        self.assertIn('Пост', event['cards'][0])
+
+
+@override_settings(LIVE_POLL_INTERVAL=0)
+class FeedEventsViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        live.hub.reset()
+
+    def test_stream_pushes_new_posts(self):
+        response = Client().get(
+            reverse('posts:feed_events', kwargs={'feed': 'index'}))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        self.assertTrue(next(chunks).startswith(b'retry:'))
+
+        post = Post.objects.create(
+            author=FeedEventsViewTests.author, text='Новый пост')
+        chunk = next(chunks).decode()
+        response.close()
+
+        self.assertIn('id: {}\n'.format(post.pk), chunk)
+        data = json.loads(chunk.split('data: ', 1)[1])
+        self.assertEqual(data['count'], 1)
+        self.assertFalse(live.hub.subscribers)
+
+    @override_settings(LIVE_MAX_STREAMS=0)
+    def test_busy_stream_returns_503(self):
+        response = Client().get(
+            reverse('posts:feed_events', kwargs={'feed': 'index'}))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertFalse(live.hub.subscribers)
+
+    def test_follow_stream_requires_login(self):
+        response = Client().get(
+            reverse('posts:feed_events', kwargs={'feed': 'follow'}))
+
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class SharedBodyCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=SharedBodyCacheTests.author, text='Первый пост')
+        self.reader_client = Client()
+        self.reader_client.force_login(SharedBodyCacheTests.reader)
+        self.profile_url = reverse(
+            'posts:profile', kwargs={'username': 'author'})
+
+    def test_profile_body_is_shared_between_users(self):
+        """Тело профиля из кэша гостя видит и вошедший пользователь,
+        а шапка и кнопка подписки у него свои.
+        """
+        Client().get(self.profile_url)
+        Post.objects.bulk_create([
+            Post(author=SharedBodyCacheTests.author, text='Без сигналов')])
+
+        response = self.reader_client.get(self.profile_url)
+
+        self.assertContains(response, 'Первый пост')
+        self.assertNotContains(response, 'Без сигналов')
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertContains(response, 'Подписаться')
+
+    def test_new_post_changes_profile_version(self):
+        """Новый пост автора сбрасывает тело его профиля."""
+        Client().get(self.profile_url)
+        Post.objects.create(
+            author=SharedBodyCacheTests.author, text='Второй пост')
+
+        self.assertContains(Client().get(self.profile_url), 'Второй пост')
+
+    def test_comment_changes_post_version(self):
+        """Новый комментарий виден сразу, форма — только вошедшим."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = Client().get(url)
+        self.assertNotContains(response, 'Добавить комментарий')
+
+        Comment.objects.create(
+            post=self.post, author=SharedBodyCacheTests.reader,
+            text='Свежий комментарий')
+        response = self.reader_client.get(url)
+
+        self.assertContains(response, 'Свежий комментарий')
+        self.assertContains(response, 'Добавить комментарий')
+
+    def test_cached_aside_does_not_count_posts(self):
+        """Число постов автора считается только при промахе кэша блока."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        Client().get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            response = Client().get(url)
+
+        self.assertContains(response, 'Всего постов автора: <span>1</span>')
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql']])
+
+    def test_fragment_endpoint(self):
+        """Фрагменты отдаются по отдельности и не кэшируются общими."""
+        fragment = reverse('posts:fragment', kwargs={'name': 'follow_button'})
+
+        response = self.reader_client.get(fragment, {'author': 'author'})
+
+        self.assertContains(response, 'Подписаться')
+        self.assertIn('private', response['Cache-Control'])
+        header = self.reader_client.get(
+            reverse('posts:fragment', kwargs={'name': 'header'}))
+        self.assertContains(header, 'Пользователь: reader')
+        form = self.reader_client.get(
+            reverse('posts:fragment', kwargs={'name': 'comment_form'}),
+            {'post': self.post.pk})
+        self.assertContains(form, 'Добавить комментарий')
+        self.assertEqual(
+            self.reader_client.get(reverse(
+                'posts:fragment', kwargs={'name': 'unknown'})).status_code,
+            404)
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=PostCardCacheTests.user, text='Исходный текст',
+            group=PostCardCacheTests.group)
+
+    def group_page(self, slug='group'):
+        return Client().get(
+            reverse('posts:group_list', kwargs={'slug': slug}))
+
+    def test_card_is_shared_between_feeds(self):
+        """Карточка, отрисованная в одной ленте, берётся из кэша в другой."""
+        self.group_page()
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+
+        response = Client().get(reverse('posts:index'))
+
+        self.assertContains(response, 'Исходный текст')
+
+    def test_saved_post_is_rendered_again(self):
+        """Сохранение поста меняет updated и ключ карточки."""
+        self.group_page()
+        self.post.text = 'Новый текст'
+        self.post.save()
+
+        self.assertContains(self.group_page(), 'Новый текст')
+
+    def test_group_and_author_changes_touch_posts(self):
+        """Смена slug группы или имени автора обновляет карточки."""
+        self.group_page()
+        group = Group.objects.get(pk=PostCardCacheTests.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        author = User.objects.get(pk=PostCardCacheTests.user.pk)
+        author.first_name = 'Иван'
+        author.save()
+
+        response = self.group_page('renamed')
+
+        self.assertContains(response, '/group/renamed/')
+        self.assertContains(response, 'Иван')
+
+    def test_login_does_not_touch_posts(self):
+        """Вход пользователя не сбрасывает его карточки."""
+        updated = self.post.updated
+        client = Client()
+        client.force_login(PostCardCacheTests.user)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated, updated)
+
+    def test_saves_without_name_change_do_not_touch_posts(self):
+        """Смена пароля и сохранение в админке без правки имени не
+        обновляют карточки.
+        """
+        updated = self.post.updated
+        author = User.objects.get(pk=PostCardCacheTests.user.pk)
+        author.set_password('new-password-123')
+        author.save()
+        author.is_staff = True
+        author.save()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated, updated)
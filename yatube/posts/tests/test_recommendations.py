@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.follows import (
+    SUGGESTIONS_VERSION_KEY, get_suggested_authors, invalidate_suggestions)
+from posts.models import Follow, FollowSuggestion
+from posts.recommendations import compute_suggestions
+
+User = get_user_model()
+
+
+class ComputeSuggestionsTests(TestCase):
+    def test_friends_of_friends_and_cofollows_are_ranked(self):
+        """Кандидаты ранжируются по сумме оценок, подписки исключаются."""
+        suggestions = compute_suggestions(
+            [1, 1, 2, 3, 3, 4], [2, 3, 4, 2, 5, 6], k=3)
+
+        self.assertEqual(suggestions, {1: [5, 4], 2: [6], 3: [4]})
+
+    def test_top_k_is_respected(self):
+        """Для каждого читателя сохраняется не больше k авторов."""
+        suggestions = compute_suggestions(
+            [1, 2, 2, 2, 2], [2, 3, 4, 5, 6], k=2)
+
+        self.assertEqual(len(suggestions[1]), 2)
+
+
+class FollowSuggestionsViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.suggested = User.objects.create_user(username='suggested')
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.suggested)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FollowSuggestionsViewTests.reader)
+
+    def test_command_stores_suggestions_shown_on_follow_index(self):
+        """recommend_follows сохраняет рекомендации, лента их показывает."""
+        call_command('recommend_follows', stdout=StringIO())
+
+        self.assertEqual(
+            FollowSuggestion.objects.get(
+                user=FollowSuggestionsViewTests.reader).author_ids,
+            [FollowSuggestionsViewTests.suggested.pk])
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            response.context['suggested_authors'],
+            [FollowSuggestionsViewTests.suggested])
+
+    def test_followed_author_is_not_suggested(self):
+        """Автор пропадает из рекомендаций сразу после подписки."""
+        call_command('recommend_follows', stdout=StringIO())
+        Follow.objects.create(
+            user=FollowSuggestionsViewTests.reader,
+            author=FollowSuggestionsViewTests.suggested)
+
+        response = self.authorized_client.get(
+            reverse('posts:profile', kwargs={'username': 'friend'}))
+
+        self.assertEqual(response.context['suggested_authors'], [])
+
+    def test_evicted_version_does_not_revive_old_suggestions(self):
+        """После вытеснения ключа версии старые рекомендации не читаются."""
+        reader = FollowSuggestionsViewTests.reader
+        call_command('recommend_follows', stdout=StringIO())
+        get_suggested_authors(reader.pk)
+        FollowSuggestion.objects.filter(user=reader).delete()
+        invalidate_suggestions()
+        cache.delete(SUGGESTIONS_VERSION_KEY)
+
+        self.assertEqual(get_suggested_authors(reader.pk), [])
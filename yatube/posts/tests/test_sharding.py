@@ -0,0 +1,200 @@
+import threading
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts import sharding
+from posts.cached import post_cache
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+SHARDS = ['default', 'shard_1', 'shard_2']
+
+
+class HashRingTests(SimpleTestCase):
+    def test_adding_shard_moves_few_authors(self):
+        """Новый шард забирает около трети авторов, остальные на месте."""
+        before = sharding.HashRing(['a', 'b'], 64)
+        after = sharding.HashRing(['a', 'b', 'c'], 64)
+
+        moved = [key for key in range(3000)
+                 if before.node(key) != after.node(key)]
+
+        self.assertTrue(all(after.node(key) == 'c' for key in moved))
+        self.assertLess(len(moved), 1500)
+        self.assertGreater(len(moved), 500)
+
+    def test_fan_out_queries_shards_in_parallel(self):
+        names = sharding.fan_out(
+            lambda alias: threading.current_thread().name, SHARDS)
+
+        self.assertEqual(len(names), len(SHARDS))
+        self.assertTrue(all(name.startswith('shard-fanout')
+                            for name in names))
+
+
+class ShardSchemaTests(TestCase):
+    databases = set(SHARDS)
+
+    def relations(self, alias):
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            return connection.introspection.get_relations(
+                cursor, Post._meta.db_table)
+
+    def test_foreign_keys_are_kept_in_default(self):
+        self.assertEqual(
+            set(self.relations('default')), {'author_id', 'group_id'})
+
+    def test_shards_have_no_foreign_keys(self):
+        """Авторов и групп на шарде нет — ссылаться не на что."""
+        for alias in SHARDS[1:]:
+            with self.subTest(alias=alias):
+                self.assertEqual(self.relations(alias), {})
+
+
+@override_settings(POST_SHARDS=SHARDS)
+class ShardedPostsTests(TestCase):
+    databases = set(SHARDS)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.authors = {}
+        index = 0
+        while len(cls.authors) < len(SHARDS):
+            index += 1
+            user = User.objects.create_user(username='user{}'.format(index))
+            cls.authors.setdefault(sharding.shard_for_author(user.pk), user)
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.posts = {
+            alias: Post.objects.create(
+                author=author, text='Пост с {}'.format(alias),
+                group=ShardedPostsTests.group)
+            for alias, author in ShardedPostsTests.authors.items()}
+
+    def test_posts_and_comments_live_on_author_shard(self):
+        post = self.posts['shard_1']
+        Comment.objects.create(
+            post=post, author=ShardedPostsTests.reader, text='Комментарий')
+
+        self.assertEqual(post._state.db, 'shard_1')
+        self.assertFalse(Post.objects.using('default').filter(
+            pk=post.pk).exists())
+        self.assertTrue(Comment.objects.using('shard_1').filter(
+            post_id=post.pk).exists())
+        self.assertEqual(len({post.pk for post in self.posts.values()}), 3)
+
+    def test_post_detail_reads_one_shard(self):
+        post = self.posts['shard_2']
+        Comment.objects.create(
+            post=post, author=ShardedPostsTests.reader, text='Комментарий')
+
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+
+        self.assertEqual(response.context['post_detail'], post)
+        self.assertEqual(response.context['count'], 1)
+        self.assertContains(response, 'Комментарий')
+
+    def test_profile_shows_author_posts(self):
+        author = ShardedPostsTests.authors['shard_1']
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': author.username}))
+
+        self.assertEqual(
+            list(response.context['page_obj']), [self.posts['shard_1']])
+
+    def test_feeds_merge_shards_by_pub_date(self):
+        expected = sorted(
+            self.posts.values(), key=lambda post: post.pub_date,
+            reverse=True)
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', kwargs={'slug': 'group'})):
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertEqual(list(response.context['page_obj']), expected)
+                self.assertEqual(response.context['page_obj'].paginator.count,
+                                 len(SHARDS))
+
+    def test_follow_index_reads_followed_shards(self):
+        author = ShardedPostsTests.authors['shard_2']
+        Follow.objects.create(user=ShardedPostsTests.reader, author=author)
+        client = Client()
+        client.force_login(ShardedPostsTests.reader)
+
+        response = client.get(reverse('posts:follow_index'))
+
+        self.assertEqual(
+            list(response.context['page_obj']), [self.posts['shard_2']])
+
+    def test_deleting_author_removes_sharded_posts(self):
+        author_id = ShardedPostsTests.authors['shard_1'].pk
+        User.objects.get(pk=author_id).delete()
+
+        self.assertFalse(Post.objects.using('shard_1').filter(
+            author_id=author_id).exists())
+
+    def legacy_post(self, author):
+        """Пост, созданный до включения шардов: лежит в default без
+        строки ShardedId.
+        """
+        with self.settings(POST_SHARDS=['default']):
+            post = Post.objects.create(pk=1000, author=author, text='Старый')
+            Comment.objects.create(
+                post=post, author=ShardedPostsTests.reader, text='Давний')
+        return post
+
+    def test_new_ids_skip_legacy_posts(self):
+        legacy = self.legacy_post(ShardedPostsTests.authors['shard_1'])
+        sharding.seed_ids()
+
+        post = Post.objects.create(
+            author=ShardedPostsTests.authors['shard_2'], text='Новый')
+
+        self.assertGreater(post.pk, legacy.pk)
+        self.assertEqual(post_cache.get(pk=legacy.pk).text, 'Старый')
+
+    def test_rebalance_moves_posts_to_author_shard(self):
+        author = ShardedPostsTests.authors['shard_1']
+        legacy = self.legacy_post(author)
+        Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': legacy.pk}))
+
+        call_command('rebalance_shards', stdout=StringIO())
+
+        self.assertFalse(Post.objects.using('default').filter(
+            pk=legacy.pk).exists())
+        moved = Post.objects.using('shard_1').get(pk=legacy.pk)
+        self.assertEqual(moved.pub_date, legacy.pub_date)
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': legacy.pk}))
+        self.assertContains(response, 'Давний')
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': author.username}))
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+
+    def test_admin_lists_and_opens_posts_on_any_shard(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        client = Client()
+        client.force_login(admin)
+        post = self.posts['shard_2']
+
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'shard': 'shard_2'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+
+        response = client.get(
+            reverse('admin:posts_post_change', args=(post.pk,)))
+        self.assertEqual(response.context['original'], post)
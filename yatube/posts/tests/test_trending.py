@@ -0,0 +1,131 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from posts.models import Comment, Group, Post, TrendingScore
+from posts.tasks import refresh_trending_task
+from posts.trending import bump, decay, refresh_trending
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='group-test-slug',
+            description='Тестовое описание',
+        )
+        cls.quiet_post = Post.objects.create(
+            author=cls.user, text='Тихий пост')
+        cls.hot_post = Post.objects.create(
+            author=cls.user, text='Обсуждаемый пост', group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(TrendingTests.user)
+
+    def test_score_halves_after_half_life(self):
+        """Оценка убывает вдвое за период полураспада."""
+        now = timezone.now()
+        later = now + timedelta(seconds=settings.TRENDING_HALF_LIFE)
+
+        self.assertAlmostEqual(decay(4.0, now, later), 2.0)
+
+    def run_worker(self):
+        call_command('run_worker', burst=True, stdout=StringIO())
+
+    def test_comment_bumps_post_and_group(self):
+        """Комментарий повышает оценку поста и его группы."""
+        Comment.objects.create(
+            post=TrendingTests.hot_post, author=TrendingTests.user,
+            text='Комментарий')
+        self.run_worker()
+
+        top = refresh_trending()
+
+        self.assertEqual(top['posts'][0], TrendingTests.hot_post.pk)
+        self.assertEqual(top['groups'], [TrendingTests.group.pk])
+
+    def test_old_activity_loses_to_fresh_activity(self):
+        """Давняя активность уступает свежей и со временем удаляется."""
+        now = timezone.now()
+        long_ago = now - timedelta(
+            seconds=settings.TRENDING_HALF_LIFE * settings.TRENDING_HORIZON)
+        TrendingScore.objects.all().delete()
+        bump(TrendingScore.POST, TrendingTests.hot_post.pk, 100, long_ago)
+        bump(TrendingScore.POST, TrendingTests.quiet_post.pk, 1, now)
+
+        top = refresh_trending(now + timedelta(seconds=1))
+
+        self.assertEqual(top['posts'], [TrendingTests.quiet_post.pk])
+
+    def test_bumps_are_queued_not_written(self):
+        """Комментарий ставит событие в очередь, оценки пишет воркер."""
+        TrendingScore.objects.all().delete()
+        Comment.objects.create(
+            post=TrendingTests.quiet_post, author=TrendingTests.user,
+            text='Комментарий')
+
+        self.assertFalse(TrendingScore.objects.exists())
+        self.run_worker()
+        self.assertTrue(TrendingScore.objects.filter(
+            object_id=TrendingTests.quiet_post.pk).exists())
+
+    def test_late_event_does_not_inflate_score(self):
+        """Событие, обработанное позже более нового, добавляет
+        уже затухший вес.
+        """
+        now = timezone.now()
+        earlier = now - timedelta(seconds=settings.TRENDING_HALF_LIFE)
+        TrendingScore.objects.all().delete()
+        bump(TrendingScore.POST, TrendingTests.hot_post.pk, 4, now)
+        bump(TrendingScore.POST, TrendingTests.hot_post.pk, 4, earlier)
+
+        self.assertAlmostEqual(TrendingScore.objects.get().score, 6.0)
+
+    def test_page_does_not_write_on_cache_miss(self):
+        """Промах кэша собирает top-N без удаления старых оценок."""
+        long_ago = timezone.now() - timedelta(
+            seconds=settings.TRENDING_HALF_LIFE * settings.TRENDING_HORIZON)
+        bump(TrendingScore.POST, TrendingTests.quiet_post.pk, 1, long_ago)
+
+        self.authorized_client.get(reverse('posts:trending'))
+
+        self.assertTrue(TrendingScore.objects.filter(
+            updated=long_ago).exists())
+
+    def test_trending_page_is_served_from_cache(self):
+        """Страница берёт готовый top-N и помечает вкладку активной."""
+        self.run_worker()
+        refresh_trending()
+        Comment.objects.create(
+            post=TrendingTests.quiet_post, author=TrendingTests.user,
+            text='Комментарий')
+
+        response = self.authorized_client.get(reverse('posts:trending'))
+
+        self.assertTrue(response.context['trending'])
+        self.assertEqual(
+            response.context['posts'][0], TrendingTests.hot_post)
+
+    def test_refresh_task_reschedules_itself(self):
+        """Фоновый пересчёт планирует следующий запуск один раз."""
+        refresh_trending_task()
+        refresh_trending_task()
+
+        self.assertEqual(
+            Task.objects.filter(
+                name=refresh_trending_task.task_name).count(), 1)
@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.cached import post_cache
+from posts.models import Post
+from posts.view_counter import ViewCounter, view_counter
+
+User = get_user_model()
+
+
+@override_settings(VIEW_COUNTER_FLUSH_INTERVAL=3600)
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.other_post = Post.objects.create(author=cls.user, text='Другой')
+
+    def setUp(self):
+        cache.clear()
+        view_counter.reset()
+
+    def test_views_are_buffered_until_flush(self):
+        """Просмотры не пишутся в базу до сброса буфера."""
+        counter = ViewCounter()
+
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                counter.increment(ViewCounterTests.post.pk)
+        ViewCounterTests.post.refresh_from_db()
+        self.assertEqual(ViewCounterTests.post.views, 0)
+        self.assertEqual(counter.pending(ViewCounterTests.post.pk), 3)
+
+    def test_flush_writes_batched_updates(self):
+        """Сброс группирует посты с одинаковым приростом в один UPDATE."""
+        counter = ViewCounter()
+        counter.increment(ViewCounterTests.post.pk)
+        counter.increment(ViewCounterTests.other_post.pk)
+
+        with self.assertNumQueries(3):
+            self.assertEqual(counter.flush(), 2)
+
+        for post in (ViewCounterTests.post, ViewCounterTests.other_post):
+            post.refresh_from_db()
+            self.assertEqual(post.views, 1)
+        self.assertEqual(counter.flush(), 0)
+
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0)
+    def test_flush_happens_after_interval(self):
+        """По истечении интервала буфер сбрасывает сам запрос."""
+        counter = ViewCounter()
+
+        counter.increment(ViewCounterTests.post.pk)
+
+        ViewCounterTests.post.refresh_from_db()
+        self.assertEqual(ViewCounterTests.post.views, 1)
+
+    def test_post_detail_shows_pending_views(self):
+        """Страница поста показывает и ещё не сохранённые просмотры."""
+        url = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': ViewCounterTests.other_post.pk})
+        Client().get(url)
+
+        response = Client().get(url)
+
+        self.assertGreaterEqual(response.context['views'], 2)
+
+    def test_flush_keeps_post_in_object_cache(self):
+        """Сброс не выбрасывает пост из кэша, а прибавляет просмотры."""
+        counter = ViewCounter()
+        post_id = ViewCounterTests.post.pk
+        post_cache.get(pk=post_id)
+        self.assertEqual(counter.total(post_id), 0)
+        counter.increment(post_id)
+
+        counter.flush()
+
+        with self.assertNumQueries(0):
+            post_cache.get(pk=post_id)
+            self.assertEqual(counter.total(post_id), 1)
+
+    def test_edit_keeps_flushed_views(self):
+        """Правка поста из кэша не затирает сохранённые просмотры."""
+        post = ViewCounterTests.post
+        post_cache.get(pk=post.pk)
+        Post.objects.filter(pk=post.pk).update(views=5)
+        client = Client()
+        client.force_login(ViewCounterTests.user)
+
+        client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': 'Новый текст'})
+
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Новый текст')
+        self.assertEqual(post.views, 5)
+
+    def test_benchmark_does_not_record_views(self):
+        """Замер bench_post_views не оставляет просмотров в базе."""
+        post = ViewCounterTests.post
+
+        call_command('bench_post_views', '--requests', '5',
+                     '--post-id', str(post.pk), stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.views, 0)
+        self.assertEqual(view_counter.pending(post.pk), 0)
+        self.assertEqual(view_counter.total(post.pk), 0)
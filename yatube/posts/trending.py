@@ -0,0 +1,138 @@
+"""Популярные посты и группы.
+
+Оценка хранится вместе с моментом последнего обновления и затухает
+экспоненциально с периодом полураспада TRENDING_HALF_LIFE. Событие
+(новый пост, комментарий, подписка на автора) сначала «досчитывает»
+затухание, затем добавляет свой вес — так что пересчитывать всю таблицу
+не нужно. Итоговый top-N собирается по расписанию и отдаётся из кэша.
+
+Оценки пишет фоновый воркер (core.tasks): сигналы только ставят событие
+в очередь со временем события, поэтому запись поста или комментария не
+ждёт блокировки строки оценки. Страница популярного только читает.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Task
+from .cached import post_cache
+from .models import Group, Post, TrendingScore
+from .sharding import shard_for_author
+
+TRENDING_KEY = 'trending:top'
+
+
+def decay(score, since, now):
+    age = (now - since).total_seconds()
+    return score * 0.5 ** (age / settings.TRENDING_HALF_LIFE)
+
+
+def bump(kind, object_id, weight, now=None):
+    now = now or timezone.now()
+    with transaction.atomic():
+        entry, created = TrendingScore.objects.select_for_update(
+        ).get_or_create(
+            kind=kind, object_id=object_id,
+            defaults={'score': weight, 'updated': now})
+        if created:
+            return
+        if now >= entry.updated:
+            entry.score = decay(entry.score, entry.updated, now) + weight
+            entry.updated = now
+        else:
+            # Событие из очереди старше последнего обновления.
+            entry.score += decay(weight, now, entry.updated)
+        entry.save(update_fields=('score', 'updated'))
+
+
+def bump_post(post_id, group_id, event, now=None):
+    weight = settings.TRENDING_WEIGHTS[event]
+    bump(TrendingScore.POST, post_id, weight, now)
+    if group_id:
+        bump(TrendingScore.GROUP, group_id, weight, now)
+
+
+def bump_followed(author_ids, now=None):
+    """Подписка на автора поднимает его последний пост."""
+    for author_id in author_ids:
+        latest = Post.objects.using(shard_for_author(author_id)).filter(
+            author_id=author_id).only('pk', 'group_id').first()
+        if latest is not None:
+            bump_post(latest.pk, latest.group_id, 'follow', now)
+
+
+def queue_post_event(post, event):
+    """Ставит в очередь событие поста: новый пост или комментарий."""
+    from .tasks import bump_post_task
+
+    bump_post_task.delay(
+        post.pk, post.group_id, event, timezone.now().isoformat())
+
+
+def queue_followed(author_ids):
+    from .tasks import bump_followed_task
+
+    bump_followed_task.delay(list(author_ids), timezone.now().isoformat())
+
+
+def horizon(now):
+    return now - timedelta(
+        seconds=settings.TRENDING_HALF_LIFE * settings.TRENDING_HORIZON)
+
+
+def compute_top(kind, now):
+    """id объектов с наибольшей оценкой на момент now."""
+    entries = TrendingScore.objects.filter(
+        kind=kind, updated__gte=horizon(now)
+    ).values_list('object_id', 'score', 'updated')
+    ranked = sorted(
+        ((decay(score, updated, now), object_id)
+         for object_id, score, updated in entries),
+        reverse=True)
+    return [object_id for _, object_id in ranked[:settings.TRENDING_TOP_N]]
+
+
+def collect_top(now=None):
+    """Собирает top-N и кладёт в кэш. Базу только читает."""
+    now = now or timezone.now()
+    top = {
+        'posts': compute_top(TrendingScore.POST, now),
+        'groups': compute_top(TrendingScore.GROUP, now),
+    }
+    cache.set(TRENDING_KEY, top, settings.TRENDING_CACHE_TIMEOUT)
+    return top
+
+
+def refresh_trending(now=None):
+    """Пересобирает top-N и удаляет оценки, затухшие до нуля."""
+    now = now or timezone.now()
+    TrendingScore.objects.filter(updated__lt=horizon(now)).delete()
+    return collect_top(now)
+
+
+def schedule_refresh():
+    """Ставит следующий пересчёт, если он ещё не запланирован."""
+    from .tasks import refresh_trending_task
+
+    pending = Task.objects.filter(
+        name=refresh_trending_task.task_name, status=Task.QUEUED).exists()
+    if not pending:
+        refresh_trending_task.apply_async(
+            countdown=settings.TRENDING_REFRESH_INTERVAL)
+
+
+def get_trending():
+    """Возвращает (посты, группы) из последнего top-N."""
+    top = cache.get(TRENDING_KEY)
+    if top is None:
+        # Удаление затухших оценок оставлено фоновому пересчёту.
+        top = collect_top()
+    posts = post_cache.get_many(top['posts'])
+    groups = Group.objects.in_bulk(top['groups'])
+    return (
+        [posts[pk] for pk in top['posts'] if pk in posts],
+        [groups[pk] for pk in top['groups'] if pk in groups],
+    )
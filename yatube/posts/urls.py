@@ -6,6 +6,8 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -14,8 +16,14 @@ urlpatterns = [
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('fragments/<str:name>/', views.fragment, name='fragment'),
+    path('events/<str:feed>/', views.feed_events, name='feed_events'),
     path('profile/<str:username>/follow/',
          views.profile_follow, name='profile_follow'),
     path('profile/<str:username>/unfollow/',
          views.profile_unfollow, name='profile_unfollow'),
+    path('api/follow/', views.api_follow_bulk, name='api_follow_bulk'),
+    path('api/follow/<str:username>/', views.api_follow, name='api_follow'),
+    path('api/unfollow/<str:username>/',
+         views.api_unfollow, name='api_unfollow'),
 ]
@@ -0,0 +1,109 @@
+"""Буферизованный счётчик просмотров постов.
+
+Просмотры копятся в памяти процесса и раз в VIEW_COUNTER_FLUSH_INTERVAL
+секунд сбрасываются в базу пакетом UPDATE ... SET views = views + n.
+Сброс выполняет первый просмотр после истечения интервала. При
+завершении процесса теряются просмотры не более чем за один интервал:
+сброс при выходе писал бы в ту базу, что настроена на этот момент
+(в тестах — в рабочую).
+
+Сохранённое число просмотров кэшируется отдельно от поста (VIEWS_KEY)
+и при сбросе увеличивается через cache.incr, поэтому сброс не
+выбрасывает посты из кэша объектов.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import Post
+from .sharding import shard_for_post
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+VIEWS_KEY = 'post:views:{}'
+
+
+class ViewCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = Counter()
+        self._last_flush = time.monotonic()
+
+    def increment(self, post_id):
+        with self._lock:
+            self._pending[post_id] += 1
+        due = (time.monotonic() - self._last_flush
+               >= settings.VIEW_COUNTER_FLUSH_INTERVAL)
+        if due and self._flush_lock.acquire(blocking=False):
+            try:
+                self.flush()
+            finally:
+                self._flush_lock.release()
+
+    def pending(self, post_id):
+        return self._pending.get(post_id, 0)
+
+    def total(self, post_id):
+        """Сохранённые и ещё не сброшенные просмотры поста."""
+        key = VIEWS_KEY.format(post_id)
+        views = cache.get(key)
+        if views is None:
+            views = Post.objects.using(shard_for_post(post_id)).filter(
+                pk=post_id).values_list('views', flat=True).first() or 0
+            cache.add(key, views, settings.OBJECT_CACHE_TIMEOUT)
+        return views + self.pending(post_id)
+
+    def reset(self):
+        """Забывает несохранённые просмотры (для тестов)."""
+        with self._lock:
+            self._pending = Counter()
+
+    def flush(self):
+        """Записывает накопленные просмотры. Возвращает их число."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        by_shard = defaultdict(lambda: defaultdict(list))
+        for post_id, delta in pending.items():
+            by_shard[shard_for_post(post_id)][delta].append(post_id)
+        written = Counter(pending)
+        for alias, by_delta in by_shard.items():
+            try:
+                self.write(alias, by_delta)
+            except Exception:
+                logger.exception(
+                    'Не удалось сохранить просмотры, повторим позже')
+                failed = Counter({
+                    post_id: delta for delta, post_ids in by_delta.items()
+                    for post_id in post_ids})
+                written -= failed
+                with self._lock:
+                    self._pending.update(failed)
+        for post_id, delta in written.items():
+            try:
+                cache.incr(VIEWS_KEY.format(post_id), delta)
+            except ValueError:
+                # Не в кэше: следующее чтение возьмёт число из базы.
+                pass
+        return sum(written.values())
+
+    def write(self, alias, by_delta):
+        with transaction.atomic(using=alias):
+            for delta, post_ids in by_delta.items():
+                for start in range(0, len(post_ids), FLUSH_BATCH_SIZE):
+                    Post.objects.using(alias).filter(
+                        pk__in=post_ids[start:start + FLUSH_BATCH_SIZE]
+                    ).update(views=F('views') + delta)
+
+
+view_counter = ViewCounter()
@@ -1,27 +1,84 @@
+import functools
+import json
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, redirect, render
+from django.http import (
+    Http404, HttpResponse, JsonResponse, StreamingHttpResponse)
+from django.shortcuts import redirect, render
+from django.utils.cache import patch_cache_control
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import require_POST
 
+from core.db import retry_on_busy
+from users.backends import user_cache
+from . import live, sharding
+from .cached import archived_post_cache, group_cache, post_cache
+from .feeds import (
+    INDEX_FEED, author_feed, follow_feed, group_feed, paginate_feed)
+from .follows import (
+    follow_authors, get_followee_ids, get_suggested_authors, is_following,
+    unfollow_authors)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
+from .models import Follow, Group, GroupStats, Post, User
+from .page_cache import author_scope, post_scope, versions
+from .trending import get_trending
 from .utils import paginate_posts
+from .view_counter import view_counter
 
 POSTS_PER_PAGE = 10
+GROUPS_PER_PAGE = 20
 
 
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginate_posts(request, post_list, POSTS_PER_PAGE)
+    page_obj = paginate_feed(
+        request, INDEX_FEED, Post.objects.all(), POSTS_PER_PAGE)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    posts, groups = get_trending()
+    context = {
+        'posts': posts,
+        'groups': groups,
+        'trending': True,
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def group_index(request):
+    if sharding.is_sharded():
+        # Последний пост может лежать на другом шарде: JOIN невозможен.
+        groups = Group.objects.select_related('stats').order_by('title')
+    else:
+        groups = Group.objects.select_related(
+            'stats__latest_post__author').order_by('title')
+    page_obj = paginate_posts(request, groups, GROUPS_PER_PAGE)
+    if sharding.is_sharded():
+        attach_latest_posts(page_obj)
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+def attach_latest_posts(groups):
+    stats = [group.stats for group in groups if hasattr(group, 'stats')]
+    posts = post_cache.get_many(
+        {item.latest_post_id for item in stats if item.latest_post_id})
+    for item in stats:
+        GroupStats.latest_post.field.set_cached_value(
+            item, posts.get(item.latest_post_id))
+
+
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginate_posts(request, posts, POSTS_PER_PAGE)
+    group = group_cache.get_or_404(slug=slug)
+    page_obj = paginate_feed(
+        request, group_feed(group.pk), group.posts.all(), POSTS_PER_PAGE)
     context = {
         'group': group,
         'page_obj': page_obj
@@ -31,43 +88,137 @@ def group_posts(request, slug):
 
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    count_post = post_list.count()
-    page_obj = paginate_posts(request, post_list, POSTS_PER_PAGE)
+    author = user_cache.get_or_404(username=username)
+    page_obj = paginate_feed(
+        request, author_feed(author.pk), author.posts.all(), POSTS_PER_PAGE,
+        shards=(sharding.shard_for_author(author.pk),))
     if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=author).exists()
+        following = is_following(request.user.pk, author.pk)
+        suggested_authors = get_suggested_authors(request.user.pk)
     else:
         following = None
+        suggested_authors = []
 
     context = {
         'author': author,
         'page_obj': page_obj,
-        'count': count_post,
+        'count': page_obj.paginator.count,
         'following': following,
+        'suggested_authors': suggested_authors,
+        'body_version': versions(author_scope(author.pk)),
     }
     return render(request, template, context)
 
 
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    try:
+        post = post_cache.get(pk=post_id)
+    except Post.DoesNotExist:
+        return archived_post_detail(request, post_id)
+    if settings.VIEW_COUNTER_ENABLED:
+        view_counter.increment(post.pk)
     form = CommentForm(request.POST or None)
-    author = post.author
-    count = author.posts.count()
+    author = post.author = user_cache.get(pk=post.author_id)
+    # Считается при отрисовке, то есть только при промахе кэша блока
+    # post_aside.
+    count = SimpleLazyObject(author.posts.count)
     comments = post.comments.all()
     context = {
         'author': author,
         'post_detail': post,
         'count': count,
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'views': view_counter.total(post.pk),
+        'body_version': versions(
+            author_scope(author.pk), post_scope(post.pk)),
     }
     return render(request, template, context)
 
 
+def archived_post_detail(request, post_id):
+    """Пост, перенесённый в архив: только чтение, без формы комментария."""
+    post = archived_post_cache.get_or_404(pk=post_id)
+    author = post.author = user_cache.get(pk=post.author_id)
+    context = {
+        'author': author,
+        'post_detail': post,
+        'count': SimpleLazyObject(author.posts.count),
+        'comments': post.comments.all(),
+        'views': post.views,
+        'archived': True,
+        'body_version': versions(
+            author_scope(author.pk), post_scope(post.pk)),
+    }
+    return render(request, 'posts/post_detail.html', context)
+
+
+def feed_events(request, feed):
+    """Поток Server-Sent Events о новых постах ленты index или follow.
+
+    Курсор — id последнего известного поста из заголовка Last-Event-ID
+    или параметра cursor; ``?cards=1`` добавляет отрисованные карточки.
+    Соединение занимает поток сервера, поэтому их число на процесс
+    ограничено LIVE_MAX_STREAMS.
+    """
+    if feed == 'index':
+        authors = None
+    elif feed == 'follow':
+        if not request.user.is_authenticated:
+            return HttpResponse(status=401)
+        authors = set(get_followee_ids(request.user.pk))
+    else:
+        raise Http404
+    cursor = request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get(
+        'cursor', '')
+    subscriber = live.hub.subscribe(
+        authors, cards=request.GET.get('cards') == '1',
+        limit=settings.LIVE_MAX_STREAMS)
+    if subscriber is None:
+        response = HttpResponse(status=503)
+        response['Retry-After'] = settings.LIVE_RETRY_MS // 1000
+        return response
+    response = StreamingHttpResponse(
+        live.stream(
+            live.hub, subscriber, int(cursor) if cursor.isdigit() else None),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+FRAGMENTS = {
+    'header': 'includes/header.html',
+    'follow_button': 'includes/follow_button.html',
+    'comment_form': 'includes/comment_form.html',
+}
+
+
+def fragment(request, name):
+    """Персональный фрагмент страницы для сборки поверх общего тела."""
+    if name not in FRAGMENTS:
+        raise Http404
+    context = {}
+    if name == 'follow_button':
+        author = user_cache.get_or_404(username=request.GET.get('author'))
+        context['author'] = author
+        context['following'] = (
+            request.user.is_authenticated
+            and is_following(request.user.pk, author.pk))
+    elif name == 'comment_form':
+        post_id = request.GET.get('post', '')
+        if not post_id.isdigit():
+            raise Http404
+        context['post_detail'] = post_cache.get_or_404(pk=post_id)
+        context['form'] = CommentForm()
+    response = render(request, FRAGMENTS[name], context)
+    patch_cache_control(response, private=True, max_age=0)
+    return response
+
+
 @login_required
+@retry_on_busy
 def post_create(request):
     template = 'posts/create_post.html'
 
@@ -87,11 +238,12 @@ def post_create(request):
 
 
 @login_required
+@retry_on_busy
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
-    post = get_object_or_404(Post, id=post_id)
+    post = post_cache.get_or_404(pk=post_id)
 
-    if request.user != post.author:
+    if request.user.pk != post.author_id:
         return redirect('posts:post_detail', post_id=post_id)
 
     form = PostForm(
@@ -101,7 +253,10 @@ def post_edit(request, post_id):
     )
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
+            # Пост взят из кэша: полное сохранение затёрло бы просмотры,
+            # сброшенные счётчиком после кэширования.
+            form.save(commit=False).save(
+                update_fields=[*form.fields, 'updated'])
             return redirect('posts:post_detail', post_id=post_id)
 
     context = {
@@ -112,8 +267,9 @@ def post_edit(request, post_id):
 
 
 @login_required
+@retry_on_busy
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = post_cache.get_or_404(pk=post_id)
     form = CommentForm(request.POST or None)
     if request.method == 'POST':
         if form.is_valid():
@@ -126,27 +282,106 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(
-        author__following__user=request.user).select_related(
-        'author', 'group')
-    page_obj = paginate_posts(request, post_list, POSTS_PER_PAGE)
-    context = {'page_obj': page_obj}
+    followee_ids = get_followee_ids(request.user.pk)
+    post_list = Post.objects.filter(author_id__in=followee_ids)
+    page_obj = paginate_feed(
+        request, follow_feed(request.user.pk), post_list, POSTS_PER_PAGE,
+        depends_on=(INDEX_FEED,),
+        shards=sharding.shards_for_authors(followee_ids))
+    context = {
+        'page_obj': page_obj,
+        'suggested_authors': get_suggested_authors(request.user.pk),
+    }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@retry_on_busy
 def profile_follow(request, username):
     current_user = request.user
-    author = get_object_or_404(User, username=username)
+    author = user_cache.get_or_404(username=username)
     if author != current_user:
         Follow.objects.get_or_create(author=author, user=current_user)
     return redirect('posts:follow_index')
 
 
 @login_required
+@retry_on_busy
 def profile_unfollow(request, username):
     current_user = request.user
-    author = get_object_or_404(User, username=username)
+    author = user_cache.get_or_404(username=username)
     follow_obj = Follow.objects.filter(author=author, user=current_user)
     follow_obj.delete()
     return redirect('posts:follow_index')
+
+
+def json_login_required(view):
+    """Как login_required, но вместо редиректа отвечает 401 в JSON."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Требуется вход.'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def follow_state(user, author):
+    return {
+        'author': author.username,
+        'following': is_following(user.pk, author.pk),
+        'followers': author.following.count(),
+        'followees': len(get_followee_ids(user.pk)),
+    }
+
+
+@require_POST
+@json_login_required
+@retry_on_busy
+def api_follow(request, username):
+    """Подписка без перехода в ленту; повторный вызов ничего не меняет."""
+    author = user_cache.get_or_404(username=username)
+    follow_authors(request.user.pk, [author.pk])
+    return JsonResponse(follow_state(request.user, author))
+
+
+@require_POST
+@json_login_required
+@retry_on_busy
+def api_unfollow(request, username):
+    author = user_cache.get_or_404(username=username)
+    unfollow_authors(request.user.pk, [author.pk])
+    return JsonResponse(follow_state(request.user, author))
+
+
+@require_POST
+@json_login_required
+@retry_on_busy
+def api_follow_bulk(request):
+    """Пакетная подписка: {"follow": [имена], "unfollow": [имена]}."""
+    try:
+        data = json.loads(request.body.decode())
+        follow = data.get('follow', [])
+        unfollow = data.get('unfollow', [])
+    except (ValueError, AttributeError):
+        return JsonResponse({'error': 'Неверный JSON.'}, status=400)
+    if not all(isinstance(names, list) for names in (follow, unfollow)):
+        return JsonResponse({'error': 'Ожидаются списки имён.'}, status=400)
+    names = follow + unfollow
+    if not all(isinstance(name, str) for name in names):
+        return JsonResponse({'error': 'Ожидаются имена авторов.'}, status=400)
+    if len(names) > settings.FOLLOW_BULK_LIMIT:
+        return JsonResponse({'error': 'Не больше {} авторов за раз.'.format(
+            settings.FOLLOW_BULK_LIMIT)}, status=400)
+    ids = dict(User.objects.filter(username__in=names).values_list(
+        'username', 'pk'))
+    names_by_id = {pk: name for name, pk in ids.items()}
+    followed = follow_authors(
+        request.user.pk, [ids[name] for name in follow if name in ids])
+    unfollowed = unfollow_authors(
+        request.user.pk, [ids[name] for name in unfollow if name in ids])
+    return JsonResponse({
+        'followed': [names_by_id[pk] for pk in followed],
+        'unfollowed': [names_by_id[pk] for pk in unfollowed],
+        'unknown': [name for name in dict.fromkeys(names) if name not in ids],
+        'followees': len(get_followee_ids(request.user.pk)),
+    })
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from core.object_cache import ObjectCache
+
+User = get_user_model()
+
+user_cache = ObjectCache(
+    User, natural_key=User.USERNAME_FIELD,
+    timeout_setting='USER_CACHE_TIMEOUT')
+
+
+def get_cached_user(user_id):
+    try:
+        return user_cache.get(pk=user_id)
+    except User.DoesNotExist:
+        return None
+
+
+def invalidate_cached_user(user_id):
+    user_cache.invalidate(user_id)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Запись в кэше сбрасывается при любом сохранении пользователя (смена
+    пароля, правка профиля, last_login) и при выходе, поэтому проверка
+    хэша сессии в django.contrib.auth.get_user остаётся корректной.
+    """
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        return user if self.user_can_authenticate(user) else None
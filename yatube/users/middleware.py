@@ -0,0 +1,20 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+
+LEGACY_BACKENDS = {'django.contrib.auth.backends.ModelBackend'}
+SESSION_BACKEND = 'users.backends.CachedModelBackend'
+
+
+class LegacySessionBackendMiddleware:
+    """Переводит сессии, открытые через ModelBackend до появления
+    CachedModelBackend, на кэширующий бэкенд. Без этого пришлось бы
+    держать ModelBackend в AUTHENTICATION_BACKENDS, и неудачный вход
+    проверял бы пароль дважды.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.session.get(BACKEND_SESSION_KEY) in LEGACY_BACKENDS:
+            request.session[BACKEND_SESSION_KEY] = SESSION_BACKEND
+        return self.get_response(request)
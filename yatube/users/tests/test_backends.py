@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class CachedAuthenticationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', password='old-password-123')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(CachedAuthenticationTests.user)
+        self.url = reverse('about:author')
+
+    def test_session_and_user_are_served_from_cache(self):
+        """Повторный запрос авторизованного пользователя
+        не обращается к базе.
+        """
+        self.authorized_client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(self.url)
+
+        self.assertEqual(
+            response.context['user'], CachedAuthenticationTests.user)
+
+    def test_sessions_from_model_backend_stay_logged_in(self):
+        """Сессии, открытые через ModelBackend, переживают выкладку."""
+        client = Client()
+        client.force_login(
+            CachedAuthenticationTests.user,
+            backend='django.contrib.auth.backends.ModelBackend')
+
+        response = client.get(self.url)
+
+        self.assertEqual(
+            response.context['user'], CachedAuthenticationTests.user)
+        self.assertEqual(client.session['_auth_user_backend'],
+                         'users.backends.CachedModelBackend')
+        with self.assertNumQueries(0):
+            client.get(self.url)
+
+    def test_failed_login_checks_password_once(self):
+        with mock.patch.object(
+                User, 'check_password', autospec=True,
+                return_value=False) as check_password:
+            with self.assertNumQueries(1):
+                self.assertIsNone(
+                    authenticate(username='auth', password='wrong'))
+
+        self.assertEqual(check_password.call_count, 1)
+
+    def test_unknown_user_hashes_password_once(self):
+        with mock.patch.object(
+                User, 'set_password', autospec=True) as set_password:
+            with self.assertNumQueries(1):
+                self.assertIsNone(
+                    authenticate(username='ghost', password='wrong'))
+
+        self.assertEqual(set_password.call_count, 1)
+
+    def test_login_uses_cached_backend(self):
+        self.client.login(username='auth', password='old-password-123')
+
+        self.assertEqual(
+            self.client.session['_auth_user_backend'],
+            'users.backends.CachedModelBackend')
+
+    def test_profile_edit_is_visible_immediately(self):
+        """Правка профиля сбрасывает закэшированного пользователя."""
+        self.authorized_client.get(self.url)
+        user = User.objects.get(username='auth')
+        user.first_name = 'Лев'
+        user.save()
+
+        response = self.authorized_client.get(self.url)
+
+        self.assertEqual(response.context['user'].first_name, 'Лев')
+
+    def test_password_change_ends_other_sessions(self):
+        """После смены пароля старая сессия перестаёт действовать."""
+        self.authorized_client.get(self.url)
+        user = User.objects.get(username='auth')
+        user.set_password('new-password-456')
+        user.save()
+
+        response = self.authorized_client.get(self.url)
+
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_logout_clears_session(self):
+        """После выхода пользователь анонимен."""
+        self.authorized_client.get(self.url)
+        self.authorized_client.get(reverse('users:logout'))
+
+        response = self.authorized_client.get(self.url)
+
+        self.assertFalse(response.context['user'].is_authenticated)
@@ -28,11 +28,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.timing.ServerTimingMiddleware',
+    'core.middleware.metrics.MetricsMiddleware',
+    'core.middleware.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'users.middleware.LegacySessionBackendMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,9 +70,42 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'CONN_MAX_AGE': 60,
+    },
+}
+
+# Шарды постов и комментариев (posts.sharding): каждая база, кроме
+# default, хранит только эти две таблицы. Посты распределяются по
+# алиасам из POST_SHARDS; по умолчанию всё лежит в default. После
+# изменения POST_SHARDS посты переносит manage.py rebalance_shards.
+# Авторов и групп на шардах нет, поэтому там внешние ключи не создаются
+# (core.shard_backend); в default они остаются.
+for shard in ('shard_1', 'shard_2'):
+    DATABASES[shard] = dict(
+        DATABASES['default'],
+        ENGINE='core.shard_backend',
+        NAME=os.path.join(BASE_DIR, 'db_{}.sqlite3'.format(shard)))
+
+DATABASE_ROUTERS = ['posts.routers.AuthorShardRouter']
+POST_SHARDS = ['default']
+SHARD_VIRTUAL_NODES = 64
+SHARD_FANOUT_WORKERS = 4
+SHARD_MOVE_BATCH_SIZE = 500
+
+# Применяются к каждому новому соединению (core.db.set_sqlite_pragmas).
+# Ожидание блокировки задаёт только busy_timeout.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
 }
 
+SQLITE_BUSY_RETRIES = 3
+SQLITE_BUSY_RETRY_DELAY = 0.05
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -98,6 +137,51 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 STATIC_URL = '/static/'
 
+# Сессии, открытые через ModelBackend до появления CachedModelBackend,
+# переводит на него users.middleware.LegacySessionBackendMiddleware.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+]
+
+# Сессии читаются из кэша и синхронно пишутся в базу.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+USER_CACHE_TIMEOUT = 15 * 60
+# Посты и группы по pk и slug (core.object_cache).
+OBJECT_CACHE_TIMEOUT = 15 * 60
+# Списки id постов на страницах лент (posts.feeds).
+FEED_CACHE_TIMEOUT = 15 * 60
+
+# Защита от одновременного пересчёта (core.stampede): коэффициент
+# досрочного пересчёта, время блокировки, сколько ещё отдавать
+# устаревшее значение, пока идёт пересчёт, и сколько секунд запрос ждёт
+# чужой пересчёт, прежде чем посчитать сам.
+STAMPEDE_BETA = 1.0
+STAMPEDE_LOCK_TIMEOUT = 10
+STAMPEDE_STALE_TTL = 60
+STAMPEDE_WAIT_TIMEOUT = 1
+
+# Поток новых постов (posts.live, posts:feed_events): как часто процесс
+# проверяет ленту, размер буфера для переподключений, пауза между
+# keepalive-комментариями и время жизни одного соединения.
+# Запросы к базе от числа клиентов не зависят, но каждое соединение
+# держит поток WSGI-сервера всё время жизни: синхронным воркерам нужен
+# поток на клиента (gunicorn --worker-class gthread --threads N, где N
+# больше LIVE_MAX_STREAMS плюс обычные запросы). Сверх LIVE_MAX_STREAMS
+# соединений на процесс поток отвечает 503, а короткое время жизни
+# быстрее освобождает потоки: клиент переподключается сам и получает
+# пропущенное по Last-Event-ID.
+LIVE_POLL_INTERVAL = 2
+LIVE_BUFFER_SIZE = 500
+LIVE_HEARTBEAT_INTERVAL = 15
+LIVE_STREAM_TIMEOUT = 60
+LIVE_RETRY_MS = 3000
+LIVE_MAX_STREAMS = 50
+
+# Архив старых постов (posts.archive, команда archive_posts).
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 500
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -112,6 +196,87 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.backends.InstrumentedLocMemCache',
     }
 }
+
+# Фоновая очередь задач (core.tasks, команда run_worker).
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BACKOFF = 10
+TASK_RETRY_BACKOFF_MAX = 60 * 60
+TASK_LOCK_TIMEOUT = 10 * 60
+TASK_CLAIM_BATCH = 10
+TASK_POLL_INTERVAL = 1
+# Выполненные задачи удаляются через сутки; воркер проверяет это раз в
+# TASK_PURGE_INTERVAL секунд.
+TASK_DONE_TTL = 24 * 60 * 60
+TASK_PURGE_INTERVAL = 10 * 60
+TASK_PURGE_BATCH = 1000
+
+FOLLOWEES_CACHE_TIMEOUT = 60 * 60
+# Сколько авторов можно передать в пакетную подписку (api_follow_bulk).
+FOLLOW_BULK_LIMIT = 200
+
+# Рекомендации «Кого почитать» (команда recommend_follows).
+FOLLOW_SUGGESTIONS_TOP_K = 10
+FOLLOW_SUGGESTIONS_SHOWN = 5
+FOLLOW_SUGGESTIONS_TIMEOUT = 60 * 60
+
+# Популярное (posts.trending): веса событий и затухание оценок.
+TRENDING_WEIGHTS = {
+    'post': 1.0,
+    'comment': 2.0,
+    'follow': 3.0,
+}
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_HORIZON = 8
+TRENDING_TOP_N = 20
+TRENDING_REFRESH_INTERVAL = 5 * 60
+TRENDING_CACHE_TIMEOUT = 3 * TRENDING_REFRESH_INTERVAL
+
+# Варианты выбора группы в PostForm и админке.
+GROUP_CHOICES_CACHE_TIMEOUT = 60 * 60
+
+# Счётчик просмотров постов (posts.view_counter).
+VIEW_COUNTER_ENABLED = True
+VIEW_COUNTER_FLUSH_INTERVAL = 10
+
+# Прогрев шаблонов и раздача статики (см. settings_production.py).
+TEMPLATE_WARMUP = False
+SERVE_STATIC = False
+STATIC_CACHE_MAX_AGE = 0
+
+# Сжатие ответов (core.middleware.compression).
+COMPRESSION_MIN_SIZE = 512
+COMPRESSION_LEVELS = {
+    'text/html': 6,
+    'application/json': 6,
+    'text/css': 9,
+    'application/javascript': 9,
+    'text/event-stream': 1,
+    'default': 5,
+}
+COMPRESSION_SKIP_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff',
+    'application/gzip', 'application/zip', 'application/octet-stream',
+)
+
+# Заголовок Server-Timing и лог фаз запроса (core.middleware.timing).
+SERVER_TIMING_ENABLED = False
+
+THUMBNAIL_BACKEND = 'core.thumbnails.TimedThumbnailBackend'
+
+# Профилирование запросов сотрудников: ?_profile=1 или заголовок X-Profile.
+PROFILER_ENABLED = True
+PROFILER_QUERY_PARAM = '_profile'
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Метрики Prometheus: /metrics доступен сотрудникам и сборщику с
+# заголовком Authorization: Bearer <METRICS_TOKEN>; None — только
+# сотрудникам.
+METRICS_ENABLED = True
+METRICS_TOKEN = None
+
+# Журнал медленных SQL-запросов (секунды; None — выключен).
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'logs', 'slow_queries.jsonl')
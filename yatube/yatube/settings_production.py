@@ -0,0 +1,59 @@
+"""Настройки для продакшена: DJANGO_SETTINGS_MODULE=yatube.settings_production.
+"""
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, TEMPLATES
+
+DEBUG = False
+
+# Ключ из settings.py лежит в репозитории и в продакшене не годится.
+SECRET_KEY = os.environ.get('SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Задайте переменную окружения SECRET_KEY.')
+
+ALLOWED_HOSTS = os.environ.get(
+    'ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Шаблоны компилируются один раз на процесс и прогреваются при старте
+# (core.templates.warm_templates в yatube/wsgi.py).
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATE_WARMUP = True
+
+# Статика с хэшем в имени и готовыми .gz-копиями (core.storage).
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.storage.GzipManifestStaticFilesStorage'
+SERVE_STATIC = True
+STATIC_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Кэш: LRU в памяти каждого воркера перед общим для всех воркеров L2.
+# Файловый L2 — простая замена Redis/Memcached на одной машине.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.backends.TieredCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': 5000,
+            'L1_TIMEOUT': 5,
+            'SYNC_INTERVAL': 0.5,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}